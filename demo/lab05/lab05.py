@@ -11,7 +11,7 @@ from spacja.algorithms import ford_fulkerson
 
 
 def generate_network(N):
-    return gb.get_random_flow_network(N)
+    return gb.get_random_flow_network(N, verbose=True)
 
 
 def prep_dir(save_dir):
@@ -6,8 +6,8 @@ from ast import literal_eval
 
 sys.path.insert(0, "../..")
 
+from spacja.complete_graph import CompleteGraph
 from spacja.directed_graph import DirectedGraph
-from spacja.simple_graph import SimpleGraph
 from spacja.graph_builder import GraphBuilder as gb
 from spacja.algorithms import page_rank, simulated_annealing, circuit_length
 from spacja.functions import number_to_alpha
@@ -83,7 +83,7 @@ def example04():
 
 
 def example05():
-    g = SimpleGraph().from_coordinates("input.dat")
+    g = CompleteGraph.from_coordinates("input.dat")
     P = None
     for MAX_IT in range(10, 150, 5):
         P = simulated_annealing(g, MAX_IT, save=True, P=P)
@@ -93,7 +93,7 @@ def example05():
 
 
 def example06():
-    g = gb.get_random_2D_graph(size=50)
+    g = gb.get_random_2D_graph(size=50, implicit=True)
     P = None
     for _ in range(100):
         P = simulated_annealing(g, save=True, P=P)
@@ -103,7 +103,7 @@ def example06():
 
 
 def example07():
-    g = SimpleGraph().from_coordinates("input.dat")
+    g = CompleteGraph.from_coordinates("input.dat")
     P = None
     for _ in range(100):
         P = simulated_annealing(g, MAX_IT=100, save=True, P=P)
@@ -1,24 +1,29 @@
 """Algorytmy działające na grafach"""
-import copy
 import collections
+import heapq
 import math
+import multiprocessing
+import os
 import random
 import numpy as np
-from typing import List, Tuple, Dict
+from typing import Any, List, Tuple, Dict, Iterable, Sequence
 import matplotlib.pyplot as plt
 
 
 from spacja.functions import get_trail_to_node, stopwatch
+from spacja.csr_graph import CSRGraph
 from spacja.graph import Graph
 from spacja.simple_graph import SimpleGraph
 from spacja.directed_graph import DirectedGraph
-from spacja.helper_structures import Matrix, Node
+from spacja.helper_structures import Matrix, Node, DisjointSet
 
 
 def find_eulerian_trail(g: SimpleGraph) -> List[Node]:
     """Znajduje losowy cykl Eulera w grafie"""
     if not g.is_eulerian():
         raise ValueError(f"Nie jest to graf Eulerowski\n{g}")
+    # krawędzie są usuwane w trakcie, więc algorytm działa na kopii
+    g = _mutable_copy(g)
 
     solution = []
     stack = [random.choice(tuple(g.nodes))]
@@ -34,9 +39,15 @@ def find_eulerian_trail(g: SimpleGraph) -> List[Node]:
     return solution
 
 
+def _mutable_copy(g: Graph) -> Graph:
+    """Kopia grafu do modyfikacji; migawka CSRGraph jest rozmrażana"""
+    if isinstance(g, CSRGraph):
+        return g.thaw()
+    return g.copy(share=True)
+
+
 def find_hamiltonian_circuit(g: SimpleGraph) -> List[Node]:
     """Znajduje losowy cykl Hamiltona w grafie"""
-    g = copy.deepcopy(g)
     if not g.is_connected_graph():
         raise ValueError(f"Graf nie jest spójny:\n{g}")
     stack = [random.choice(tuple(g.nodes))]
@@ -64,66 +75,243 @@ def hamilton_search_r(g: SimpleGraph, stack: List[Node]) -> List[Node]:
 
 
 def find_shortest_path_dijkstra(
-    g: SimpleGraph, source: Node
+    g: SimpleGraph, source: Node, target: Node = None
 ) -> Tuple[Dict[int, float], Dict[int, int]]:
     """ Przyjmuje graf i zrodlo (wierzcholek).
         Zwraca:
         - slownik odleglosci od zrodla
         - slownik poprzednikow
+        target:
+            obliczenia koncza sie po wyznaczeniu odleglosci do target;
+            dokladne sa tylko odleglosci target i wierzcholkow blizszych,
+            pozostale maja odleglosc inf i poprzednika None
     """
-    predecessors = {}
-    distance = {}
-    # kolejka priorytetowa dla wierzchołkow grafu (klucz: aktualnie wyliczona odleglosc)
+    return find_shortest_path_dijkstra_multi_source(g, [source], target)
+
+
+def find_shortest_path_dijkstra_multi_source(
+    g: SimpleGraph, sources: Iterable[Node], target: Node = None
+) -> Tuple[Dict[int, float], Dict[int, int]]:
+    """ Dijkstra z wieloma zrodlami (odleglosc do najblizszego z nich).
+        Zwraca to samo co find_shortest_path_dijkstra
+    """
+    predecessors = {node: None for node in g.nodes}
+    distance = {node: math.inf for node in g.nodes}
+    # kolejka priorytetowa (odleglosc, wierzcholek); zamiast zmniejszania klucza
+    # dokladamy nowy wpis, a nieaktualne pomijamy przy zdejmowaniu
     Q = []
-    for node in g.nodes:
-        distance[node] = float("inf")
-        predecessors[node] = None
-        Q.append(node)
-    distance[source] = 0
+    for source in sources:
+        distance[source] = 0
+        Q.append((0, source))
+    heapq.heapify(Q)
+    done = set()
 
     while Q:
-        Q.sort(key=lambda n: distance[n])
-        u = Q.pop(0)
-        for v in g.node_neighbours(u):
-            if v in Q:
-                new_distance = distance[u] + g.edge_to_node(u, v).weight
-                old_distance = distance[v]
-                if new_distance < old_distance:
-                    distance[v] = new_distance
-                    predecessors[v] = u
+        d, u = heapq.heappop(Q)
+        if u in done:
+            continue
+        done.add(u)
+        if u == target:
+            # odległości nieprzetworzonych wierzchołków nie są ostateczne
+            for v in g.nodes:
+                if v not in done:
+                    distance[v] = math.inf
+                    predecessors[v] = None
+            break
+        for v, weight in g.node_weights(u).items():
+            new_distance = d + weight
+            if new_distance < distance[v]:
+                distance[v] = new_distance
+                predecessors[v] = u
+                heapq.heappush(Q, (new_distance, v))
 
-    d = {node: distance[node] for node in g.nodes}
-    p = {node: predecessors[node] for node in g.nodes}
+    return distance, predecessors
 
-    return d, p
 
+# gęstość grafu (krawędzie / n(n-1)), od której algorithm="auto"
+# wybiera algorytm Floyda-Warshalla zamiast Dijkstry z każdego wierzchołka
+FLOYD_WARSHALL_DENSITY = 0.01
 
-def get_distances_to_nodes_matrix(g: Graph) -> Matrix:
-    distances_matrix = [[0 for _ in g.nodes] for _ in g.nodes]
-    for node in g.nodes:
-        distances, _ = find_shortest_path_dijkstra(g, node)
-        for to_node, distance in distances.items():
-            distances_matrix[node - 1][to_node - 1] = distance
 
-    return distances_matrix
+def get_distances_to_nodes_matrix(
+    g: Graph, processes: int = 1, algorithm: str = "auto"
+) -> np.ndarray:
+    """
+    Macierz odległości między wszystkimi parami wierzchołków
+    (inf dla nieosiągalnych)
+        algorithm:
+            dijkstra - Dijkstra z każdego wierzchołka
+            floyd_warshall - patrz find_shortest_paths_floyd_warshall
+            auto - floyd_warshall dla grafów o gęstości co najmniej
+                   FLOYD_WARSHALL_DENSITY, w przeciwnym razie dijkstra
+        processes:
+            (tylko dijkstra) liczba procesów roboczych (None - liczba
+            procesorów); graf w postaci CSR i macierz wynikowa są w pamięci
+            współdzielonej: procesy czytają graf wprost z niej, bez własnych
+            kopii, a wiersze wyniku zapisują bezpośrednio do macierzy
+    """
+    csr = g.freeze()
+    n = len(csr)
+    if algorithm == "auto":
+        dense = n > 1 and len(csr.indices) >= FLOYD_WARSHALL_DENSITY * n * (n - 1)
+        algorithm = "floyd_warshall" if dense else "dijkstra"
+    if algorithm == "floyd_warshall":
+        distances, _ = find_shortest_paths_floyd_warshall(csr, successors=False)
+        return distances
+    if algorithm != "dijkstra":
+        raise ValueError(f"Nieznany algorytm: {algorithm}")
+    if processes == 1:
+        result = np.empty((n, n))
+        _dijkstra_rows(
+            range(n),
+            csr.indptr.tolist(),
+            csr.indices.tolist(),
+            csr.weights.tolist(),
+            result,
+        )
+        return result
+
+    indptr = _shared_array(csr.indptr, "q")
+    indices = _shared_array(csr.indices, "q")
+    weights = _shared_array(csr.weights, "d")
+    shared_result = multiprocessing.RawArray("d", n * n)
+    processes = processes or os.cpu_count()
+    chunksize = max(1, -(-n // (4 * processes)))
+    chunks = [range(i, min(i + chunksize, n)) for i in range(0, n, chunksize)]
+    with multiprocessing.Pool(
+        processes, _apsp_init, (indptr, indices, weights, shared_result)
+    ) as pool:
+        for _ in pool.imap_unordered(_apsp_rows, chunks):
+            pass
+    return np.frombuffer(shared_result).reshape(n, n).copy()
+
+
+def _shared_array(array: np.ndarray, typecode: str) -> Any:
+    """Kopia tablicy numpy w pamięci współdzielonej z procesami roboczymi"""
+    shared = multiprocessing.RawArray(typecode, len(array))
+    np.frombuffer(shared, dtype=typecode)[:] = array
+    return shared
+
+
+# graf i macierz wynikowa w procesie roboczym get_distances_to_nodes_matrix
+_apsp_state = {}
+
+
+def _apsp_init(indptr, indices, weights, result) -> None:
+    # widoki memoryview czytają wprost z pamięci współdzielonej, bez kopii
+    # w każdym procesie, a pojedyncze odczyty zwracają liczby Pythona, więc są
+    # niemal tak szybkie jak z listy (w przeciwieństwie do indeksowania numpy)
+    _apsp_state["graph"] = (
+        memoryview(indptr).cast("B").cast("q"),
+        memoryview(indices).cast("B").cast("q"),
+        memoryview(weights).cast("B").cast("d"),
+    )
+    n = len(indptr) - 1
+    _apsp_state["result"] = np.frombuffer(result).reshape(n, n)
+
+
+def _apsp_rows(sources: Iterable[int]) -> None:
+    _dijkstra_rows(sources, *_apsp_state["graph"], _apsp_state["result"])
+
+
+def _dijkstra_rows(
+    sources: Iterable[int],
+    indptr: Sequence[int],
+    indices: Sequence[int],
+    weights: Sequence[float],
+    out: np.ndarray,
+) -> None:
+    """
+    Dijkstra na tablicach CSR (numeracja od 0): out[s] to odległości od s
+    dla każdego źródła s z sources
+    """
+    n = len(indptr) - 1
+    for source in sources:
+        distance = [math.inf] * n
+        distance[source] = 0
+        Q = [(0, source)]
+        while Q:
+            d, u = heapq.heappop(Q)
+            if d > distance[u]:
+                continue
+            for i in range(indptr[u], indptr[u + 1]):
+                v = indices[i]
+                new_distance = d + weights[i]
+                if new_distance < distance[v]:
+                    distance[v] = new_distance
+                    heapq.heappush(Q, (new_distance, v))
+        out[source] = distance
+
+
+def find_shortest_paths_floyd_warshall(
+    g: Graph, successors: bool = True, block_size: int = 64
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Algorytm Floyda-Warshalla na macierzy sąsiedztwa numpy
+    Zwraca:
+        - macierz odległości (inf dla nieosiągalnych)
+        - macierz następników: successors[u - 1, v - 1] to wierzchołek po u
+          na najkrótszej ścieżce u -> v (0 jeśli jej nie ma), patrz
+          functions.get_trail_from_successors; None gdy successors=False
+    Krok k to operacja na całych wierszach: D = min(D, D[:, k] + D[k, :]).
+    Wierzchołki pośrednie są brane blokami po block_size, a dla każdego bloku
+    macierz jest aktualizowana pasami wierszy mieszczącymi się w pamięci
+    podręcznej, najpierw pas wierszy samego bloku
+    """
+    csr = g.freeze()
+    n = len(csr)
+    rows, cols, weights = csr.to_adjacency_matrix("coo")
+    D = np.full((n, n), np.inf)
+    D[rows, cols] = weights
+    np.fill_diagonal(D, np.minimum(D.diagonal(), 0))
+    S = None
+    if successors:
+        S = np.zeros((n, n), dtype=np.int64)
+        S[rows, cols] = cols + 1
+        np.fill_diagonal(S, np.arange(1, n + 1))
+
+    # pas ok. 256 KiB wierszy
+    band = max(1, (1 << 15) // max(n, 1))
+    for k0 in range(0, n, block_size):
+        block = range(k0, min(k0 + block_size, n))
+        _floyd_warshall_band(D, S, k0, block.stop, block)
+        for i0 in range(0, n, band):
+            i1 = min(i0 + band, n)
+            # z pominięciem wierszy bloku, które zostały już policzone
+            _floyd_warshall_band(D, S, i0, min(i1, k0), block)
+            _floyd_warshall_band(D, S, max(i0, block.stop), i1, block)
+
+    if np.any(D.diagonal() < 0):
+        raise ValueError("Wystepuje cykl o ujemnych wagach.")
+    return D, S
+
+
+def _floyd_warshall_band(
+    D: np.ndarray, S: np.ndarray, i0: int, i1: int, block: range
+) -> None:
+    """Kroki k z block dla wierszy i0:i1 macierzy odległości D i następników S"""
+    if i0 >= i1:
+        return
+    rows = D[i0:i1]
+    for k in block:
+        through_k = rows[:, k, np.newaxis] + D[k]
+        if S is None:
+            np.minimum(rows, through_k, out=rows)
+        else:
+            shorter = through_k < rows
+            np.copyto(rows, through_k, where=shorter)
+            # kolumna k się nie zmienia, bo D[k, k] = 0
+            np.copyto(S[i0:i1], S[i0:i1, k, np.newaxis], where=shorter)
 
 
-def get_graph_center(g: Graph) -> Node:
-    distances_matrix = get_distances_to_nodes_matrix(g)
-    summary_distances = [
-        sum(distances_from_node) for distances_from_node in distances_matrix
-    ]
-    graph_center = summary_distances.index(min(summary_distances)) + 1
-    return graph_center
+def get_graph_center(g: Graph, processes: int = 1) -> Node:
+    distances_matrix = get_distances_to_nodes_matrix(g, processes)
+    return int(np.argmin(distances_matrix.sum(axis=1))) + 1
 
 
-def get_minimax_graph_center(g: Graph) -> Node:
-    distances_matrix = get_distances_to_nodes_matrix(g)
-    max_distances = [
-        max(distances_from_node) for distances_from_node in distances_matrix
-    ]
-    minimax_graph_center = max_distances.index(min(max_distances)) + 1
-    return minimax_graph_center
+def get_minimax_graph_center(g: Graph, processes: int = 1) -> Node:
+    distances_matrix = get_distances_to_nodes_matrix(g, processes)
+    return int(np.argmin(distances_matrix.max(axis=1))) + 1
 
 
 def get_minimum_spanning_tree_kruskal(g: SimpleGraph) -> SimpleGraph:
@@ -134,16 +322,12 @@ def get_minimum_spanning_tree_kruskal(g: SimpleGraph) -> SimpleGraph:
     """
     # minimum spanning tree
     mst = SimpleGraph(len(g))
-    Q = []
-    for edge in g.edges:
-        Q.append(edge)
-
-    while Q and not mst.is_connected_graph():
-        Q.sort(key=lambda e: e.weight)
-        current_edge = Q.pop(0)
-        comps = mst.components()
-        if comps[current_edge.begin] != comps[current_edge.end]:
-            mst.edges.add(current_edge)
+    sets = DisjointSet(g.nodes)
+    for edge in sorted(g.edges, key=lambda e: e.weight):
+        if sets.count == 1:
+            break
+        if sets.union(edge.begin, edge.end):
+            mst.connect(edge.begin, edge.end, edge.weight)
     return mst
 
 
@@ -191,7 +375,7 @@ def find_shortest_path_bellman_ford(
 
 def johnson_get_distances_to_nodes_matrix(g: Graph) -> Matrix:
     # dodaj wierzchołek s na potrzeby algorytmu
-    g_p = copy.deepcopy(g)
+    g_p = _mutable_copy(g)
     g_p.add_nodes()
     s = max(g_p.nodes)
     for node in g.nodes:
@@ -206,8 +390,8 @@ def johnson_get_distances_to_nodes_matrix(g: Graph) -> Matrix:
     for v in g_p.nodes:
         h[v] = d[v]
 
-    for edge in g_p.edges:
-        edge.weight = edge.weight + h[edge.begin] - h[edge.end]
+    for edge in list(g_p.edges):
+        g_p.connect(edge.begin, edge.end, edge.weight + h[edge.begin] - h[edge.end])
 
     distances_matrix = [[0 for _ in g.nodes] for _ in g.nodes]
     for u in g.nodes:
@@ -247,7 +431,7 @@ def ford_fulkerson(
 ) -> Dict[Tuple[int, int], int]:
     """Edmonds–Karp implementation"""
     # sieć rezydualna
-    gf = copy.deepcopy(g)
+    gf = g.copy(share=True)
     # źródło
     s: Node = 1
     # ujście
@@ -279,7 +463,7 @@ def ford_fulkerson(
                 if verbose:
                     print(f"kasowanie przepływu, krawędź: ({u}, {v})")
         # update residual network weights
-        gf.edges = set()
+        gf = DirectedGraph(len(g))
         for u, v, c in {(e.begin, e.end, e.weight) for e in g.edges}:
             w1 = c - f[(u, v)]
             w2 = f[(u, v)]
@@ -369,9 +553,13 @@ def simulated_annealing(g: SimpleGraph, MAX_IT=None, P: List[int] = None, save=F
         for _ in range(MAX_IT):
             # switch: a-b c-d --> a-c b-d
             _, b, c, _ = _choose_nodes(P)
+            # zmieniają się tylko krawędzie wychodzące z pozycji b-1, b, c-1, c,
+            # więc nie trzeba liczyć od nowa długości całego cyklu
+            changed = {(b - 1) % len(P), b, (c - 1) % len(P), c}
+            d_old = _edges_length(adj_m, P, changed)
             P[b], P[c] = P[c], P[b]
 
-            d_new = circuit_length(adj_m, P)
+            d_new = d - d_old + _edges_length(adj_m, P, changed)
             if d_new < d:
                 d = d_new
             else:
@@ -381,6 +569,9 @@ def simulated_annealing(g: SimpleGraph, MAX_IT=None, P: List[int] = None, save=F
                 else:
                     # switch back
                     P[b], P[c] = P[c], P[b]
+        # długość liczona przyrostowo gromadzi błędy zaokrągleń,
+        # więc po każdej temperaturze jest liczona od nowa
+        d = circuit_length(adj_m, P)
 
     if save:
         x = [g.x[n - 1] for n in P]
@@ -411,6 +602,14 @@ def _choose_nodes(P: List[int]) -> Tuple[int, int, int, int]:
             return a, b, c, d
 
 
+def _edges_length(adj_m, P: List[int], positions: Iterable[int]) -> float:
+    """Suma wag krawędzi P[i] -- P[i + 1] cyklu dla podanych pozycji i"""
+    length = 0.0
+    for i in positions:
+        length += adj_m[P[i] - 1][P[(i + 1) % len(P)] - 1]
+    return length
+
+
 def circuit_length(adj_m, P: List[int]) -> float:
     length = 0.0
     for i in range(len(P)):
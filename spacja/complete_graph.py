@@ -0,0 +1,181 @@
+"""Graf pełny na punktach płaszczyzny, bez przechowywania krawędzi"""
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, Set, Union
+
+import numpy as np
+
+from spacja.functions import sparse_to_matrix
+from spacja.helper_structures import Node, Edge, EdgeTable, AdjacencyMatrix
+
+
+class DistanceMatrix:
+    """
+    Macierz odległości liczona na żądanie: m[i][j] albo m[i, j]
+    (numeracja od 0, jak w macierzy sąsiedztwa)
+    Zajmuje O(n) pamięci; np.asarray(m) tworzy pełną macierz
+    """
+
+    def __init__(self, graph: CompleteGraph) -> None:
+        self.graph = graph
+
+    def __len__(self) -> int:
+        return len(self.graph)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, tuple):
+            i, j = index
+            return self.graph.distance(i + 1, j + 1)
+        return _DistanceRow(self.graph, index)
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> np.ndarray:
+        return self.graph.to_adjacency_matrix("numpy", dtype)
+
+
+class _DistanceRow:
+    __slots__ = ("graph", "node")
+
+    def __init__(self, graph: CompleteGraph, index: int) -> None:
+        self.graph = graph
+        self.node = index + 1
+
+    def __len__(self) -> int:
+        return len(self.graph)
+
+    def __getitem__(self, index: int) -> float:
+        return self.graph.distance(self.node, index + 1)
+
+
+class CompleteGraph:
+    """
+    Graf pełny, którego wierzchołek i + 1 leży w punkcie (x[i], y[i]),
+    a waga krawędzi to odległość euklidesowa między punktami
+    Wagi są liczone na żądanie ze współrzędnych, więc graf zajmuje O(n) pamięci
+    zamiast n(n-1)/2 obiektów Edge
+        cache:
+            odległości są liczone raz i trzymane w tablicy n x n
+            (szybciej, ale O(n^2) pamięci)
+    Udostępnia API odczytu Graph potrzebne m.in. w simulated_annealing
+    """
+
+    directed = False
+
+    def __init__(
+        self, x: Iterable[float], y: Iterable[float], cache: bool = False
+    ) -> None:
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        if self.x.shape != self.y.shape or self.x.ndim != 1:
+            raise ValueError("Tablice x i y muszą być jednowymiarowe i równej długości")
+        # współrzędne jako listy, bo pojedyncze odczyty z list są szybsze
+        self._x = self.x.tolist()
+        self._y = self.y.tolist()
+        self._nodes = None
+        self._distances = self._distance_array() if cache else None
+        self.separator = "--"
+        self.name = "graph"
+
+    @classmethod
+    def from_coordinates(cls, filename: str, cache: bool = False) -> CompleteGraph:
+        """Wczytuje punkty zapisane w pliku w wierszach "x y" """
+        points = np.loadtxt(filename, ndmin=2)
+        return cls(points[:, 0], points[:, 1], cache)
+
+    def __len__(self) -> int:
+        return len(self._x)
+
+    @property
+    def nodes(self) -> Set[Node]:
+        if self._nodes is None:
+            self._nodes = frozenset(range(1, len(self) + 1))
+        return self._nodes
+
+    def _distance_array(self) -> np.ndarray:
+        dx = self.x[:, np.newaxis] - self.x
+        dy = self.y[:, np.newaxis] - self.y
+        return np.sqrt(dx * dx + dy * dy)
+
+    def distance(self, node1: Node, node2: Node) -> float:
+        """Waga krawędzi node1 -- node2"""
+        if self._distances is not None:
+            return self._distances[node1 - 1, node2 - 1].item()
+        dx = self._x[node1 - 1] - self._x[node2 - 1]
+        dy = self._y[node1 - 1] - self._y[node2 - 1]
+        return math.sqrt(dx * dx + dy * dy)
+
+    def is_complete(self) -> bool:
+        return True
+
+    def is_connected_graph(self) -> bool:
+        return len(self) > 0
+
+    def is_weighted_graph(self) -> bool:
+        return True
+
+    def is_connected(self, node1: Node, node2: Node) -> bool:
+        """Czy stnieje krawędź node1 -- node2"""
+        return node1 != node2 and node1 in self.nodes and node2 in self.nodes
+
+    def edge_to_node(self, begin: Node, end: Node) -> Edge:
+        """Get edge that connects given two nodes"""
+        if not self.is_connected(begin, end):
+            raise KeyError((begin, end))
+        return Edge(begin, end, self.distance(begin, end))
+
+    def node_neighbours(self, node: Node) -> Set[Node]:
+        """Returns nodes adjacent to a given node"""
+        return set(self.nodes) - {node}
+
+    def node_weights(self, node: Node) -> Dict[Node, float]:
+        """Returns weights of edges from the given node, keyed by neighbour"""
+        if self._distances is not None:
+            row = self._distances[node - 1]
+        else:
+            dx = self.x - self.x[node - 1]
+            dy = self.y - self.y[node - 1]
+            row = np.sqrt(dx * dx + dy * dy)
+        weights = dict(enumerate(row.tolist(), 1))
+        del weights[node]
+        return weights
+
+    def node_degree(self, node: Node) -> int:
+        """Returns degree of the selected node"""
+        return len(self) - 1
+
+    def graph_sequence(self):
+        """Zwraca ciąg graficzny"""
+        return [len(self) - 1] * len(self)
+
+    def to_edge_table(self) -> EdgeTable:
+        """Zwraca krawędzie (begin < end) w postaci struktury tablic, O(n^2)"""
+        begin, end = np.triu_indices(len(self), 1)
+        if self._distances is not None:
+            weight = self._distances[begin, end]
+        else:
+            dx = self.x[begin] - self.x[end]
+            dy = self.y[begin] - self.y[end]
+            weight = np.sqrt(dx * dx + dy * dy)
+        return EdgeTable(begin + 1, end + 1, weight)
+
+    def to_adjacency_matrix(
+        self, matrix_format: str = "lazy", dtype: Any = None
+    ) -> Union[DistanceMatrix, AdjacencyMatrix]:
+        """
+        Zwraca graf w postaci macierzy sąsiedztwa
+            matrix_format:
+                lazy - DistanceMatrix liczona na żądanie, O(n) pamięci
+                list, numpy, coo, csr (patrz functions.sparse_to_matrix)
+        """
+        if matrix_format == "lazy":
+            return DistanceMatrix(self)
+        n = len(self)
+        distances = self._distances
+        if distances is None:
+            distances = self._distance_array()
+        if matrix_format == "numpy":
+            return distances.astype(dtype, copy=False) if dtype else distances.copy()
+        rows, cols = np.nonzero(~np.eye(n, dtype=bool))
+        return sparse_to_matrix(
+            rows, cols, distances[rows, cols], (n, n), matrix_format, dtype
+        )
@@ -0,0 +1,298 @@
+"""Niezmienna migawka grafu w formacie CSR (compressed sparse row)"""
+from __future__ import annotations
+
+import struct
+from typing import Any, Dict, Set, List, Tuple
+
+import numpy as np
+
+from spacja.functions import (
+    sparse_to_matrix,
+    dfs_components,
+    strongly_connected_components,
+    component_lists,
+)
+from spacja.helper_structures import (
+    Node,
+    Edge,
+    Weight,
+    EdgeTable,
+    AdjacencyList,
+    AdjacencyMatrix,
+)
+
+# nagłówek pliku .npg: znacznik, czy skierowany, typy tablic indices i weights,
+# liczba wierzchołków, liczba krawędzi, długość tablic indices i weights
+NPG_MAGIC = b"NPG1"
+NPG_HEADER = struct.Struct("<4s?3x4s4sqqq")
+
+
+def _aligned(offset: int) -> int:
+    """Tablice w pliku .npg zaczynają się od adresu podzielnego przez 8"""
+    return (offset + 7) // 8 * 8
+
+
+class CSRGraph:
+    """
+    Graf tylko do odczytu zapisany w trzech tablicach:
+        indptr - krawędzie wychodzące z wierzchołka v zajmują
+                 przedział indptr[v - 1]:indptr[v]
+        indices - końce krawędzi (numeracja od 0), posortowane w każdym wierszu
+        weights - wagi krawędzi
+    W grafie prostym każda krawędź jest zapisana w obu kierunkach.
+    Udostępnia to samo API odczytu co Graph.
+    """
+
+    def __init__(
+        self,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        weights: np.ndarray,
+        directed: bool = False,
+    ) -> None:
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices)
+        if self.indices.dtype.kind not in "iu":
+            self.indices = self.indices.astype(np.int64)
+        self.weights = np.asarray(weights)
+        self.directed = directed
+        self._nodes = None
+        self.separator = "->" if directed else "--"
+        self.name = "digraph" if directed else "graph"
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def nodes(self) -> Set[Node]:
+        # tworzony przy pierwszym użyciu, żeby load() nie czekał na n obiektów
+        if self._nodes is None:
+            self._nodes = frozenset(range(1, len(self) + 1))
+        return self._nodes
+
+    def save(self, filename: str) -> None:
+        """Zapisuje migawkę w binarnym formacie .npg"""
+        n = len(self)
+        if self.directed:
+            edges_count = len(self.indices)
+        else:
+            edges_count = int(np.count_nonzero(self._rows() <= self.indices))
+        index_type = np.dtype("<i4") if n < 2 ** 31 else np.dtype("<i8")
+        weight_type = self.weights.dtype.newbyteorder("<")
+        header = NPG_HEADER.pack(
+            NPG_MAGIC,
+            self.directed,
+            index_type.str.encode(),
+            weight_type.str.encode(),
+            n,
+            edges_count,
+            len(self.indices),
+        )
+        with open(filename, "wb") as f:
+            f.write(header)
+            for array, dtype in (
+                (self.indptr, np.dtype("<i8")),
+                (self.indices, index_type),
+                (self.weights, weight_type),
+            ):
+                f.write(bytes(_aligned(f.tell()) - f.tell()))
+                array.astype(dtype, copy=False).tofile(f)
+
+    @classmethod
+    def load(cls, filename: str, mmap: bool = True) -> CSRGraph:
+        """
+        Wczytuje migawkę z pliku .npg
+            mmap:
+                tablice są mapowane z pliku do pamięci, a nie wczytywane,
+                więc zapytania działają od razu, bez czytania całego pliku
+        """
+        arrays = []
+        with open(filename, "rb") as f:
+            header = f.read(NPG_HEADER.size)
+            if len(header) != NPG_HEADER.size or header[:4] != NPG_MAGIC:
+                raise ValueError(f"{filename} nie jest plikiem .npg")
+            _, directed, indices_type, weights_type, n, _, nnz = NPG_HEADER.unpack(
+                header
+            )
+
+            offset = NPG_HEADER.size
+            for dtype, count in (
+                (np.dtype("<i8"), n + 1),
+                (np.dtype(indices_type.rstrip(b"\0").decode()), nnz),
+                (np.dtype(weights_type.rstrip(b"\0").decode()), nnz),
+            ):
+                offset = _aligned(offset)
+                if count == 0:
+                    array = np.zeros(0, dtype=dtype)
+                elif mmap:
+                    array = np.memmap(f, dtype, "r", offset, (count,))
+                else:
+                    f.seek(offset)
+                    array = np.fromfile(f, dtype, count)
+                arrays.append(array)
+                offset += dtype.itemsize * count
+        return cls(*arrays, directed=directed)
+
+    def _rows(self) -> np.ndarray:
+        """Początki krawędzi (numeracja od 0) odpowiadające tablicy indices"""
+        return np.repeat(np.arange(len(self)), np.diff(self.indptr))
+
+    def copy(self, share: bool = False) -> CSRGraph:
+        """Migawka jest niezmienna, więc kopia to ten sam obiekt"""
+        return self
+
+    def thaw(self) -> Any:
+        """Zwraca modyfikowalny graf (SimpleGraph albo DirectedGraph) z migawki"""
+        # import tutaj, bo moduły grafów importują ten moduł
+        from spacja.directed_graph import DirectedGraph
+        from spacja.simple_graph import SimpleGraph
+
+        g = DirectedGraph() if self.directed else SimpleGraph()
+        table = self.to_edge_table()
+        return g.from_edge_arrays(table.begin, table.end, table.weight, len(self))
+
+    def freeze(self) -> CSRGraph:
+        """Jak Graph.freeze; migawka już jest w formacie CSR"""
+        return self
+
+    @property
+    def edges(self) -> Set[Edge]:
+        """Krawędzie grafu (w grafie prostym każda krawędź raz, begin <= end)"""
+        return set(
+            edge
+            for edge in self.get_all_possible_edges()
+            if self.directed or edge.begin <= edge.end
+        )
+
+    def get_all_possible_edges(self) -> Set[Edge]:
+        return set(
+            Edge(begin, end, weight)
+            for begin, end, weight in zip(
+                (self._rows() + 1).tolist(),
+                (self.indices + 1).tolist(),
+                self.weights.tolist(),
+            )
+        )
+
+    def to_edge_table(self) -> EdgeTable:
+        """Zwraca krawędzie grafu (jak w edges) w postaci struktury tablic"""
+        rows = self._rows()
+        if self.directed:
+            keep = slice(None)
+        else:
+            keep = rows <= self.indices
+        return EdgeTable(rows[keep] + 1, self.indices[keep] + 1, self.weights[keep])
+
+    def is_weighted_graph(self) -> bool:
+        return bool(np.any(self.weights != 1))
+
+    def node_neighbours(self, node: Node) -> Set[Node]:
+        """Returns nodes adjacent to a given node"""
+        a, b = self.indptr[node - 1], self.indptr[node]
+        return set((self.indices[a:b] + 1).tolist())
+
+    def node_edges(self, node: Node) -> Set[Edge]:
+        """Returns set of edges adjacent to the given node"""
+        a, b = self.indptr[node - 1], self.indptr[node]
+        return set(
+            Edge(node, end, weight)
+            for end, weight in zip(
+                (self.indices[a:b] + 1).tolist(), self.weights[a:b].tolist()
+            )
+        )
+
+    def node_weights(self, node: Node) -> Dict[Node, Weight]:
+        """Returns weights of edges from the given node, keyed by neighbour"""
+        a, b = self.indptr[node - 1], self.indptr[node]
+        return dict(zip((self.indices[a:b] + 1).tolist(), self.weights[a:b].tolist()))
+
+    def node_degree(self, node: Node) -> int:
+        """Returns degree of the selected node"""
+        return int(self.indptr[node] - self.indptr[node - 1])
+
+    def _position(self, begin: Node, end: Node) -> int:
+        """Indeks krawędzi begin -> end w tablicach indices/weights albo -1"""
+        if not 1 <= begin <= len(self):
+            return -1
+        a, b = self.indptr[begin - 1], self.indptr[begin]
+        i = a + int(np.searchsorted(self.indices[a:b], end - 1))
+        if i < b and self.indices[i] == end - 1:
+            return i
+        return -1
+
+    def edge_to_node(self, begin: Node, end: Node) -> Edge:
+        """Get edge that connects given two nodes"""
+        i = self._position(begin, end)
+        if i == -1:
+            raise KeyError((begin, end))
+        return Edge(begin, end, self.weights[i].item())
+
+    def is_connected(self, node1: Node, node2: Node) -> bool:
+        """Czy stnieje krawędź node1 -- node2"""
+        return self._position(node1, node2) != -1
+
+    def is_complete(self) -> bool:
+        n = len(self)
+        return len(self.indices) == n * (n - 1)
+
+    def has_dangling_nodes(self) -> bool:
+        return bool(np.any(np.diff(self.indptr) == 0))
+
+    def components(self) -> Dict[int, int]:
+        """
+        Zwraca słownik złożony z wierzchołków i spójnych składowych do których
+        należą (w grafie skierowanym silnie spójnych, algorytmem kosaraju)
+        """
+        adj = self.to_adjacency_list()
+        if self.directed:
+            return strongly_connected_components(adj, self._predecessor_list())
+        return dfs_components(adj, adj)
+
+    def _predecessor_list(self) -> AdjacencyList:
+        """Lista poprzedników, czyli lista sąsiedztwa grafu transponowanego"""
+        order = np.argsort(self.indices, kind="stable")
+        begins = (self._rows()[order] + 1).tolist()
+        counts = np.bincount(self.indices, minlength=len(self))
+        bounds = np.concatenate(([0], np.cumsum(counts))).tolist()
+        return {
+            node: set(begins[bounds[node - 1] : bounds[node]]) for node in self.nodes
+        }
+
+    def component_list(self) -> Dict[int, List[int]]:
+        """Zwraca słownik złożony ze spójnych składowych i list ich wierzchołków"""
+        return component_lists(self.components())
+
+    def largest_component(self) -> Tuple[int, List[int]]:
+        """Zwraca największą spójną składową"""
+        return max(self.component_list().items(), key=lambda t: len(t[1]))
+
+    def is_connected_graph(self) -> bool:
+        """Czy jest to graf spójny"""
+        return len(self.component_list()) == 1
+
+    def is_eulerian(self) -> bool:
+        """Czy jest to graf Eulerowski"""
+        if not self.is_connected_graph():
+            return False
+        return all(d % 2 == 0 for d in self.graph_sequence())
+
+    def graph_sequence(self) -> List[int]:
+        """Zwraca ciąg graficzny"""
+        return sorted(np.diff(self.indptr).tolist(), reverse=True)
+
+    def to_adjacency_list(self) -> AdjacencyList:
+        """Zwraca graf w postaci listy sąsiedztwa"""
+        return {node: self.node_neighbours(node) for node in self.nodes}
+
+    def to_adjacency_matrix(
+        self, matrix_format: str = "list", dtype: Any = None
+    ) -> AdjacencyMatrix:
+        """
+        Zwraca graf w postaci macierzy sąsiedztwa
+            matrix_format:
+                list, numpy, coo, csr (patrz functions.sparse_to_matrix)
+        """
+        n = len(self)
+        return sparse_to_matrix(
+            self._rows(), self.indices, self.weights, (n, n), matrix_format, dtype
+        )
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
 import os
-import random
-import itertools
-import copy
-from typing import Set, Union, Dict, List
+from typing import Any, Set, Union, Dict, List
 
+import numpy as np
+
+from spacja.functions import (
+    sparse_to_matrix,
+    matrix_to_sparse,
+    dfs_events,
+    strongly_connected_components,
+)
 from spacja.graph import Graph
 from spacja.helper_structures import (
     Node,
     Edge,
+    EdgeTable,
     Weight,
     AdjacencyList,
     AdjacencyMatrix,
@@ -18,10 +24,15 @@ from spacja.helper_structures import (
 
 
 class DirectedGraph(Graph):
+    _index_names = ("_adj", "_adj_in")
+
     def __init__(self, *args, **kwargs) -> None:
+        # indeks krawędzi wchodzących: wierzchołek -> {poprzednik: krawędź}
+        self._adj_in: Dict[Node, Dict[Node, Edge]] = {}
         super().__init__(*args, **kwargs)
         self.separator = "->"
         self.name = "digraph"
+        self.directed = True
 
     def get_all_possible_edges(self) -> Set[Edge]:
         return self.edges
@@ -33,25 +44,89 @@ class DirectedGraph(Graph):
 
         new_edge = Edge(node1, node2, weight)
 
+        self._unshare(node1, node2)
+        old_edge = self._adj[node1].get(node2)
+        if old_edge is not None:
+            self.edges.discard(old_edge)
+            self._count_weight(old_edge, -1)
+        else:
+            self._count_degree(node1, 1)
         self.edges.add(new_edge)
+        self._count_weight(new_edge, 1)
+        self._adj[node1][node2] = new_edge
+        self._adj_in[node2][node1] = new_edge
+
+    def _insert_edges(
+        self, begins: List[Node], ends: List[Node], weights: List[Weight]
+    ) -> None:
+        """Wstawia sprawdzone krawędzie do zbioru krawędzi i indeksów"""
+        adj = self._adj
+        adj_in = self._adj_in
+        edges = self.edges
+        for node1, node2, weight in zip(begins, ends, weights):
+            new_edge = Edge(node1, node2, weight)
+            old_edge = adj[node1].get(node2)
+            if old_edge is not None:
+                edges.discard(old_edge)
+                self._count_weight(old_edge, -1)
+            edges.add(new_edge)
+            adj[node1][node2] = new_edge
+            adj_in[node2][node1] = new_edge
+
+    def _delete_edges(self, begins: List[Node], ends: List[Node]) -> None:
+        """Usuwa istniejące krawędzie ze zbioru krawędzi i indeksów"""
+        adj = self._adj
+        adj_in = self._adj_in
+        edges = self.edges
+        for node1, node2 in zip(begins, ends):
+            edge = adj[node1].pop(node2)
+            del adj_in[node2][node1]
+            edges.remove(edge)
+            self._count_weight(edge, -1)
 
     def disconnect(self, node1: Node, node2: Node) -> None:
         """Usuwa krawędż między wierzchołkiem node1 a node2"""
         if node1 not in self.nodes or node2 not in self.nodes or node1 == node2:
             raise ValueError
 
-        edges_to_be_deleted = [
-            edge for edge in self.edges if node1 == edge.begin and node2 == edge.end
-        ]
-        edge_to_be_deleted = edges_to_be_deleted[0]
+        self._unshare(node1, node2)
+        if node2 in self._adj[node1]:
+            self._count_degree(node1, -1)
+        edge_to_be_deleted = self._adj[node1].pop(node2)
+        del self._adj_in[node2][node1]
         self.edges.remove(edge_to_be_deleted)
+        self._count_weight(edge_to_be_deleted, -1)
 
     def is_connected(self, node1: Node, node2: Node) -> bool:
         """Czy stnieje krawędź node1 -- node2"""
-        return node2 in [edge.end for edge in self.edges if edge.begin == node1]
+        return node2 in self._adj.get(node1, ())
+
+    def add_nodes(self, count: int = 1) -> None:
+        """Tworzy nowe wierzchołki"""
+        first = len(self) + 1
+        super().add_nodes(count)
+        for i in range(first, len(self) + 1):
+            self._adj_in[i] = {}
+
+    def clear(self) -> None:
+        super().clear()
+        self._adj_in.clear()
+
+    def node_predecessors(self, node: Node) -> Set[Node]:
+        """Zwraca wierzchołki, z których wychodzi krawędź do danego wierzchołka"""
+        return set(self._adj_in[node])
+
+    def to_adjacency_matrix(
+        self, matrix_format: str = "list", dtype: Any = None
+    ) -> AdjacencyMatrix:
+        """
+        Zwraca graf w postaci macierzy sąsiedztwa
+            matrix_format:
+                list, numpy, coo, csr (patrz functions.sparse_to_matrix)
+        """
+        if matrix_format != "list":
+            return self.freeze().to_adjacency_matrix(matrix_format, dtype)
 
-    def to_adjacency_matrix(self) -> AdjacencyMatrix:
-        """Zwraca graf w postaci macierzy sąsiedztwa"""
         adj_m = [[0 for _ in range(len(self))] for _ in range(len(self))]
         for edge in self.edges:
             n1 = edge.begin
@@ -61,8 +136,23 @@ class DirectedGraph(Graph):
 
         return adj_m
 
-    def to_incidence_matrix(self) -> IncidenceMatrix:
-        """Zwraca graf w postaci macierzy incydencji"""
+    def to_incidence_matrix(
+        self, matrix_format: str = "list", dtype: Any = None
+    ) -> IncidenceMatrix:
+        """
+        Zwraca graf w postaci macierzy incydencji
+            matrix_format:
+                list, numpy, coo, csr (patrz functions.sparse_to_matrix)
+        """
+        if matrix_format != "list":
+            table = self.to_edge_table()
+            columns = np.arange(len(table))
+            rows = np.concatenate((table.begin, table.end)) - 1
+            cols = np.concatenate((columns, columns))
+            values = np.concatenate((-table.weight, table.weight))
+            shape = (len(self), len(table))
+            return sparse_to_matrix(rows, cols, values, shape, matrix_format, dtype)
+
         inc_m = [[0 for _ in range(len(self.edges))] for _ in range(len(self))]
         for i, edge in enumerate(self.edges):
             n1 = edge.begin
@@ -73,96 +163,151 @@ class DirectedGraph(Graph):
 
         return inc_m
 
-    def from_adjacency_matrix(self, adj_m: AdjacencyMatrix) -> DirectedGraph:
-        """Wypełnianie grafu z macierzy sąsiedztwa"""
+    def from_adjacency_matrix(
+        self, adj_m: AdjacencyMatrix, matrix_format: str = "list", size: int = None
+    ) -> DirectedGraph:
+        """
+        Wypełnianie grafu z macierzy sąsiedztwa w formacie matrix_format
+            size:
+                liczba wierzchołków; dla formatu coo bez niej rozmiar jest
+                wyznaczany z największego indeksu, więc końcowe wierzchołki
+                izolowane zostałyby pominięte
+        """
+        shape = None if size is None else (size, size)
+        rows, cols, values, shape = matrix_to_sparse(adj_m, matrix_format, shape)
         self.clear()
+        # macierz jest kwadratowa, a rozmiar wyznaczony z trójki coo może nie być
+        self.add_nodes(max(shape))
 
-        size = len(adj_m)
-        self.add_nodes(size)
-
-        for n1 in range(len(self)):
-            for n2 in range(len(self)):
-                if adj_m[n1][n2]:
-                    # mapowanie numerów wierzchołków: n-1 -> n
-                    self.connect(n1 + 1, n2 + 1, weight=adj_m[n1][n2])
+        # mapowanie numerów wierzchołków: n-1 -> n
+        self.connect_many(EdgeTable(rows + 1, cols + 1, values))
         return self
 
-    def from_incidence_matrix(self, inc_m: IncidenceMatrix) -> DirectedGraph:
-        """Wypełnianie grafu z macierzy incydencji"""
+    def from_incidence_matrix(
+        self, inc_m: IncidenceMatrix, matrix_format: str = "list", size: int = None
+    ) -> DirectedGraph:
+        """
+        Wypełnianie grafu z macierzy incydencji w formacie matrix_format
+            size:
+                liczba wierzchołków (patrz from_adjacency_matrix)
+        """
+        rows, cols, values, shape = matrix_to_sparse(inc_m, matrix_format)
+        if size is not None:
+            shape = (size, shape[1])
+        # początek krawędzi ma wpis ujemny, koniec dodatni
+        begin = values < 0
+        end = values > 0
+        edges_count = shape[1]
+        if np.any(np.bincount(cols[begin], minlength=edges_count) != 1) or np.any(
+            np.bincount(cols[end], minlength=edges_count) != 1
+        ):
+            raise ValueError("Kolumna macierzy incydencji musi mieć wpisy -w i w")
         self.clear()
-
-        nodes_count = len(inc_m)
-        self.add_nodes(nodes_count)
-
-        edges_count = len(inc_m[0])
-        for i in range(edges_count):  # il. krawedzi
-            weight = 0
-            for n in range(nodes_count):
-                # szukamy niezerowej wartosci w kolumnie
-                if inc_m[n][i]:
-                    if inc_m[n][i] < 0:
-                        begin = n
-                    else:
-                        end = n
-                    weight = abs(inc_m[n][i])
-            # mapowanie numerów wierzchołków: n-1 -> n
-            self.connect(begin + 1, end + 1, weight=weight)
+        self.add_nodes(shape[0])
+
+        begins = np.empty(edges_count, dtype=np.int64)
+        ends = np.empty(edges_count, dtype=np.int64)
+        weights = np.empty(edges_count, dtype=values.dtype)
+        begins[cols[begin]] = rows[begin] + 1
+        ends[cols[end]] = rows[end] + 1
+        weights[cols[end]] = values[end]
+        self.connect_many(EdgeTable(begins, ends, weights))
         return self
 
     def components(self) -> Dict[int, int]:
         """Zwraca słownik złożony z wierzchołków i spójnych składowych do których należą (przy pomocy algorytmu kosaraju)"""
-        g = self.to_adjacency_list()
-
-        d = {v: -1 for v in g}
-        f = {v: -1 for v in g}
-        t = 0
-
-        for v in g:
-            if d[v] == -1:
-                t = self.dfs_visit(v, g, d, f, t)
-
-        g_t = self.transposed().to_adjacency_list()
-
-        nr = 0  # nr spójnej składowej
-        comp = {v: -1 for v in g_t}
-        for v in sorted(g_t, key=lambda x: f[x], reverse=True):
-            if comp[v] == -1:
-                nr += 1
-                comp[v] = nr
-                self.components_r(nr, v, comp, g_t)
-        return comp
+        return strongly_connected_components(self._adj, self._adj_in)
 
     def dfs_visit(
-        self, v: Node, g: AdjacencyList, d: Dict[Node, int], f: Dict[Node, int], t: int
+        self,
+        v: Node,
+        g: AdjacencyList,
+        d: Dict[Node, int],
+        f: Dict[Node, int],
+        t: int,
+        visited: Set[Node] = None,
     ) -> int:
-        t += 1
-        d[v] = t
-        for u in g[v]:
-            if d[u] == -1:
-                t = self.dfs_visit(u, g, d, f, t)
-        t += 1
-        f[v] = t
+        """
+        Przeszukiwanie wgłąb z v, zapisuje czasy odwiedzenia d i zakończenia f
+            visited:
+                wierzchołki odwiedzone, uzupełniany w trakcie; przy wywołaniach
+                w pętli po kolejnych v należy przekazywać ten sam zbiór, bo bez
+                niego jest on za każdym razem budowany z d w czasie O(n)
+        """
+        if visited is None:
+            visited = {u for u, time in d.items() if time != -1}
+        for u, entered in dfs_events(g, v, visited):
+            t += 1
+            if entered:
+                d[u] = t
+            else:
+                f[u] = t
         return t
 
+    def reversed_view(self) -> ReversedGraphView:
+        """Widok grafu z odwróconymi krawędziami, bez kopiowania grafu"""
+        return ReversedGraphView(self)
+
     def transposed(self) -> DirectedGraph:
-        g_t = copy.deepcopy(self)
-        for edge in g_t.edges:
-            edge.begin, edge.end = edge.end, edge.begin
+        g_t = DirectedGraph(len(self))
+        for edge in self.edges:
+            g_t.connect(edge.end, edge.begin, edge.weight)
         return g_t
 
-    def connect_random(self, p: float) -> None:
-        """
-        Łączy wierzchołki tak, aby prawdopodobieństwo istnienia krawędzi
-        między dowolnymi dwoma wierzchołkami wynosiło p
-        iteracja po każdej kombinacji bez powtórzeń 2 wierzchołków
-        """
-        for n1, n2 in itertools.product(self.nodes, repeat=2):
-            if random.random() < p and n1 != n2:
-                self.connect(n1, n2)
-
     def has_dangling_nodes(self) -> bool:
-        adj_l = self.to_adjacency_list()
-        for s in adj_l.values():
+        for s in self._adj.values():
             if len(s) == 0:
                 return True
         return False
+
+
+class ReversedGraphView:
+    """
+    Graf skierowany z odwróconymi krawędziami, tylko do odczytu
+    Sąsiedzi wierzchołka są czytani z indeksu krawędzi wchodzących oryginału,
+    więc widok zawsze odzwierciedla aktualny stan grafu
+    """
+
+    def __init__(self, g: DirectedGraph) -> None:
+        self.graph = g
+        self.separator = g.separator
+        self.name = g.name
+        self.directed = True
+
+    @property
+    def nodes(self) -> Set[Node]:
+        return self.graph.nodes
+
+    @property
+    def edges(self) -> Set[Edge]:
+        return set(Edge(e.end, e.begin, e.weight) for e in self.graph.edges)
+
+    def __len__(self) -> int:
+        return len(self.graph)
+
+    def node_neighbours(self, node: Node) -> Set[Node]:
+        """Returns nodes adjacent to a given node"""
+        return set(self.graph._adj_in[node])
+
+    def node_edges(self, node: Node) -> Set[Edge]:
+        """Returns set of edges adjacent to the given node"""
+        return set(
+            Edge(node, begin, edge.weight)
+            for begin, edge in self.graph._adj_in[node].items()
+        )
+
+    def node_degree(self, node: Node) -> int:
+        """Returns degree of the selected node"""
+        return len(self.graph._adj_in[node])
+
+    def edge_to_node(self, begin: Node, end: Node) -> Edge:
+        """Get edge that connects given two nodes"""
+        return Edge(begin, end, self.graph._adj_in[begin][end].weight)
+
+    def is_connected(self, node1: Node, node2: Node) -> bool:
+        """Czy stnieje krawędź node1 -- node2"""
+        return self.graph.is_connected(node2, node1)
+
+    def to_adjacency_list(self) -> AdjacencyList:
+        """Zwraca graf w postaci listy sąsiedztwa"""
+        return {node: set(self.graph._adj_in[node]) for node in self.graph.nodes}
@@ -1,40 +1,42 @@
 """Pomocnicze funkcje które nie używają klasy SimpleGraph"""
 import time
+import random
 import functools
-from typing import List, Dict
-from spacja.helper_structures import Node
+import itertools
+from typing import Any, List, Dict, Set, Tuple, Iterable, Iterator, Mapping
 
+import numpy as np
 
-def is_valid_graph_sequence(seq: List) -> bool:
-    """Sprawdza czy z podanej listy da się utworzyć graf"""
-    # Jeśli liczba wierzchołków o nieparzystym stopniu jest nieparzysta to nie jest to ciąg graficzny
-    seq = list(seq)
-    odds = sum(1 for d in seq if d % 2 == 1)
-    if odds % 2 == 1:
-        return False
-
-    while True:
-        seq.sort(reverse=True)
-        # Jeśli ciąg składa się z samych zer to jest graficzny
-        for d in seq:
-            if d != 0:
-                break
-        else:
-            return True
+from spacja.helper_structures import Node, Weight
 
-        # Niemożliwa liczba krawędzi
-        if seq[0] < 0 or seq[0] >= len(seq):
-            return False
 
-        # Ujemne stopnie wierzchołków
-        for d in seq:
-            if d < 0:
-                return False
+def is_valid_graph_sequence(seq: List) -> bool:
+    """
+    Sprawdza czy z podanej listy da się utworzyć graf (twierdzenie Erdősa-Gallaia)
+    Ciąg jest sortowany przez zliczanie, a nierówności dla wszystkich k
+    sprawdzane naraz na tablicach, więc czas to O(n)
+    """
+    seq = np.asarray(seq, dtype=np.int64)
+    n = len(seq)
+    if n == 0:
+        return True
+    if seq.min() < 0 or seq.max() >= n:
+        return False
+    # Jeśli suma stopni jest nieparzysta to nie jest to ciąg graficzny
+    if seq.sum() % 2 == 1:
+        return False
 
-        for i in range(1, seq[0] + 1):
-            seq[i] -= 1
-        del seq[0]
-    return True
+    count = np.bincount(seq, minlength=n)
+    d = np.repeat(np.arange(n - 1, -1, -1), count[::-1])
+    prefix = np.concatenate(([0], np.cumsum(d)))
+    k = np.arange(1, n + 1)
+    # at_least[k] - liczba wierzchołków o stopniu >= k
+    at_least = np.cumsum(count[::-1])[::-1]
+    at_least = np.concatenate((at_least, [0]))[k]
+    # suma min(d_i, k) po i > k: stopnie >= k dają k, pozostałe same siebie
+    split = np.maximum(k, at_least)
+    rhs = k * (k - 1) + k * (split - k) + prefix[-1] - prefix[split]
+    return bool(np.all(prefix[1:] <= rhs))
 
 
 def get_all_trails_from_predecessors(
@@ -47,9 +49,107 @@ def get_all_trails_from_predecessors(
 
 
 def get_trail_to_node(predecessors: Dict[Node, Node], node: Node) -> List[Node]:
-    if predecessors[node] is None:
-        return [node]
-    return get_trail_to_node(predecessors, predecessors[node]) + [node]
+    trail = [node]
+    while predecessors[node] is not None:
+        node = predecessors[node]
+        trail.append(node)
+    trail.reverse()
+    return trail
+
+
+def get_trail_from_successors(
+    successors: np.ndarray, begin: Node, end: Node
+) -> List[Node]:
+    """
+    Ścieżka begin -> end z macierzy następników
+    (np. z algorithms.find_shortest_paths_floyd_warshall);
+    pusta lista, jeśli ścieżki nie ma
+    """
+    if successors[begin - 1, end - 1] == 0:
+        return []
+    trail = [begin]
+    while begin != end:
+        begin = successors[begin - 1, end - 1].item()
+        trail.append(begin)
+    return trail
+
+
+def dfs_events(
+    g: Mapping[Node, Iterable[Node]], start: Node, visited: Set[Node]
+) -> Iterator[Tuple[Node, bool]]:
+    """
+    Przeszukiwanie wgłąb z jawnym stosem zamiast rekurencji
+    Zwraca pary (wierzchołek, True) przy wejściu do wierzchołka
+    i (wierzchołek, False) po przejrzeniu wszystkich jego sąsiadów
+        visited:
+            wierzchołki odwiedzone - pomijane i uzupełniane w trakcie
+    Stos trzyma po jednym iteratorze sąsiadów na poziom, więc pamięć
+    jest proporcjonalna do głębokości przeszukiwania
+    """
+    if start in visited:
+        return
+    visited.add(start)
+    yield start, True
+    stack = [(start, iter(g[start]))]
+    while stack:
+        v, neighbours = stack[-1]
+        for u in neighbours:
+            if u not in visited:
+                visited.add(u)
+                yield u, True
+                stack.append((u, iter(g[u])))
+                break
+        else:
+            stack.pop()
+            yield v, False
+
+
+def dfs_components(
+    adj: Mapping[Node, Iterable[Node]], roots: Iterable[Node]
+) -> Dict[Node, int]:
+    """
+    Numeruje wierzchołki osiągalne z kolejnych nieodwiedzonych korzeni
+    (numery od 1, w kolejności korzeni); w grafie nieskierowanym z korzeniami
+    adj są to spójne składowe
+    """
+    nr = 0  # nr spójnej składowej
+    comp = {}
+    visited = set()
+    for v in roots:
+        if v not in visited:
+            nr += 1
+            for u, entered in dfs_events(adj, v, visited):
+                if entered:
+                    comp[u] = nr
+    return {v: comp[v] for v in adj}
+
+
+def strongly_connected_components(
+    adj: Mapping[Node, Iterable[Node]], adj_in: Mapping[Node, Iterable[Node]]
+) -> Dict[Node, int]:
+    """
+    Silnie spójne składowe algorytmem kosaraju
+        adj - następniki, adj_in - poprzedniki wierzchołków
+    """
+    # pierwsze przejście: wierzchołki w kolejności zakończenia przetwarzania
+    order = []
+    visited = set()
+    for v in adj:
+        for u, entered in dfs_events(adj, v, visited):
+            if not entered:
+                order.append(u)
+    # drugie przejście po grafie transponowanym
+    return dfs_components(adj_in, reversed(order))
+
+
+def component_lists(comp: Mapping[Node, int]) -> Dict[int, List[Node]]:
+    """Odwraca słownik wierzchołek -> nr składowej na nr -> posortowane wierzchołki"""
+    components = {}
+    for v, c in comp.items():
+        components.setdefault(c, []).append(v)
+    for vertices in components.values():
+        vertices.sort()
+    return components
 
 
 def stopwatch(fun):
@@ -71,3 +171,201 @@ def number_to_alpha(num: int) -> str:
     if num > 26:
         return number_to_alpha(num // 26) + chr(num % 26 + ord("A") - 1)
     return chr(num + ord("A") - 1)
+
+
+def sparse_to_matrix(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    values: np.ndarray,
+    shape: Tuple[int, int],
+    matrix_format: str = "numpy",
+    dtype: Any = None,
+) -> Any:
+    """
+    Zamienia macierz zapisaną jako trójka COO (rows, cols, values) na format:
+        list - lista list
+        numpy - gęsta tablica numpy.ndarray
+        coo - trójka tablic (rows, cols, values)
+        csr - trójka tablic (indptr, indices, data)
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    values = np.asarray(values, dtype=dtype)
+    if dtype is None and values.size == 0:
+        values = values.astype(np.int64)
+
+    if matrix_format in ("list", "numpy"):
+        m = np.zeros(shape, dtype=values.dtype)
+        m[rows, cols] = values
+        return m.tolist() if matrix_format == "list" else m
+    elif matrix_format == "coo":
+        return rows, cols, values
+    elif matrix_format == "csr":
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+        return indptr, cols[order], values[order]
+    else:
+        raise ValueError(f"Nieznany format macierzy: {matrix_format}")
+
+
+def matrix_to_sparse(
+    matrix: Any, matrix_format: str = "list", shape: Tuple[int, int] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Tuple[int, int]]:
+    """
+    Odwrotność sparse_to_matrix: zwraca (rows, cols, values, shape) niezerowych
+    elementów macierzy. Dla formatu coo rozmiar można podać w shape,
+    domyślnie jest wyznaczany z największych indeksów.
+    """
+    if matrix_format in ("list", "numpy"):
+        m = np.asarray(matrix)
+        if m.ndim == 1:
+            m = m.reshape(len(m), 0)
+        rows, cols = np.nonzero(m)
+        return rows, cols, m[rows, cols], m.shape
+    elif matrix_format == "coo":
+        rows, cols, values = (np.asarray(a) for a in matrix)
+        if shape is None:
+            shape = (
+                int(rows.max()) + 1 if rows.size else 0,
+                int(cols.max()) + 1 if cols.size else 0,
+            )
+        nonzero = values != 0
+        return rows[nonzero], cols[nonzero], values[nonzero], shape
+    elif matrix_format == "csr":
+        indptr, indices, data = (np.asarray(a) for a in matrix)
+        rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        if shape is None:
+            shape = (len(indptr) - 1, int(indices.max()) + 1 if indices.size else 0)
+        nonzero = data != 0
+        return rows[nonzero], indices[nonzero], data[nonzero], shape
+    else:
+        raise ValueError(f"Nieznany format macierzy: {matrix_format}")
+
+
+def random_state(seed: int = None) -> np.random.RandomState:
+    """
+    Generator liczb losowych numpy
+    Bez ziarna jest ono losowane z modułu random, więc random.seed()
+    nadal pozwala powtórzyć wynik
+    Ziarna dłuższe niż 32 bity są dzielone na słowa 32-bitowe
+    """
+    if seed is None:
+        seed = random.getrandbits(32)
+    if seed >= 2 ** 32:
+        words = []
+        while seed:
+            words.append(seed & 0xFFFFFFFF)
+            seed >>= 32
+        seed = words
+    return np.random.RandomState(seed)
+
+
+def unique(a: np.ndarray, return_index: bool = False) -> Any:
+    """
+    Posortowane różne wartości tablicy, jak np.unique
+    Sortowanie jest wyraźnie szybsze niż np.unique dla dużych tablic
+    liczb całkowitych w nowszych wersjach numpy
+        return_index:
+            zwraca też indeksy pierwszych wystąpień wartości w a
+    """
+    if return_index:
+        order = np.argsort(a, kind="stable")
+        a = a[order]
+    else:
+        a = np.sort(a)
+    first = np.concatenate(([True], a[1:] != a[:-1]))[: len(a)]
+    if return_index:
+        return a[first], order[first]
+    return a[first]
+
+
+def is_in_sorted(values: np.ndarray, sorted_array: np.ndarray) -> np.ndarray:
+    """Jak np.isin(values, sorted_array), dla posortowanej sorted_array"""
+    if len(sorted_array) == 0:
+        return np.zeros(len(values), dtype=bool)
+    pos = np.minimum(np.searchsorted(sorted_array, values), len(sorted_array) - 1)
+    return sorted_array[pos] == values
+
+
+def sample_indices(total: int, p: float, rng: np.random.RandomState) -> np.ndarray:
+    """
+    Losuje rosnące indeksy z przedziału [0, total), każdy niezależnie
+    z prawdopodobieństwem p (metoda Batagelja-Brandesa)
+    Zamiast losowania dla każdego indeksu losowane są odstępy między
+    kolejnymi wybranymi indeksami z rozkładu geometrycznego, więc czas
+    jest proporcjonalny do liczby wybranych indeksów
+    """
+    if total <= 0 or p <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if p >= 1:
+        return np.arange(total, dtype=np.int64)
+    chunks = []
+    last = -1
+    while True:
+        # porcja odstępów o trochę większej długości niż oczekiwana liczba indeksów
+        size = int((total - last) * p * 1.1) + 16
+        indices = last + np.cumsum(rng.geometric(p, size))
+        if indices[-1] >= total:
+            chunks.append(indices[indices < total])
+            break
+        chunks.append(indices)
+        last = int(indices[-1])
+    return np.concatenate(chunks)
+
+
+def sample_distinct(total: int, count: int, rng: np.random.RandomState) -> np.ndarray:
+    """
+    Losuje count różnych indeksów z przedziału [0, total), każdy podzbiór
+    z tym samym prawdopodobieństwem
+    Dla małego count algorytm Floyda (count losowań), a gdy count > total / 2
+    losowane jest dopełnienie, więc czas to O(min(count, total - count))
+    poza budową wyniku
+    """
+    if not 0 <= count <= total:
+        raise ValueError(f"Nie da się wybrać {count} z {total} elementów")
+    if count > total // 2:
+        rest = sample_distinct(total, total - count, rng)
+        return np.setdiff1d(np.arange(total, dtype=np.int64), rest)
+
+    # algorytm Floyda: dla j = total - count, ..., total - 1 losowe t z [0, j]
+    start = total - count
+    picks = (rng.random_sample(count) * np.arange(start + 1, total + 1)).astype(
+        np.int64
+    )
+    chosen = set()
+    for j, t in zip(range(start, total), picks.tolist()):
+        chosen.add(j if t in chosen else t)
+    return np.sort(np.fromiter(chosen, dtype=np.int64, count=count))
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Dzieli strumień na listy o długości co najwyżej size"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_weight(text: str) -> Weight:
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def read_edge_list(lines: Iterable[str]) -> Iterator[Tuple[Node, Node, Weight]]:
+    """
+    Czyta krawędzie zapisane w wierszach "u v [w]", pomija puste wiersze
+    i komentarze zaczynające się od #
+    """
+    for line in lines:
+        fields = line.split()
+        if not fields or fields[0].startswith("#"):
+            continue
+        if len(fields) not in (2, 3):
+            raise ValueError(f"Niepoprawny wiersz listy krawędzi: {line!r}")
+        weight = parse_weight(fields[2]) if len(fields) == 3 else 1
+        yield int(fields[0]), int(fields[1]), weight
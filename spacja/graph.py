@@ -1,15 +1,32 @@
 from __future__ import annotations
 
+import copy
+import collections
 import itertools
 import random
 import os
 import json
-from typing import Set, Dict, List, Tuple, Mapping, Any
+from typing import Set, Dict, List, Tuple, Mapping, Any, Iterable, Iterator, Union
 from abc import ABC, abstractmethod
 
-from spacja.helper_structures import Node, Edge, Weight
-from spacja.functions import is_valid_graph_sequence, number_to_alpha
+import numpy as np
+
+from spacja.helper_structures import Node, Edge, EdgeTable, Weight
+from spacja.functions import (
+    is_valid_graph_sequence,
+    number_to_alpha,
+    chunked,
+    dfs_events,
+    random_state,
+    sample_indices,
+    sample_distinct,
+    unique,
+    is_in_sorted,
+    read_edge_list,
+    component_lists,
+)
 from spacja.colors import colors
+from spacja.csr_graph import CSRGraph
 
 from spacja.helper_structures import (
     AdjacencyList,
@@ -18,12 +35,28 @@ from spacja.helper_structures import (
 )
 
 
+# liczba wierszy listy krawędzi zapisywanych/wczytywanych naraz
+EDGE_LIST_CHUNK = 65536
+
+
 class Graph(ABC):
+    # atrybuty z indeksami sąsiedztwa postaci wierzchołek -> {sąsiad: krawędź}
+    _index_names: Tuple[str, ...] = ("_adj",)
+
     def __init__(self, size: int = 0) -> None:
         self.nodes: Set[Node] = set()
         self.edges: Set[Edge] = set()
+        # indeks krawędzi wychodzących: wierzchołek -> {sąsiad: krawędź}
+        self._adj: Dict[Node, Dict[Node, Edge]] = {}
+        # wierzchołki, których wiersze indeksów są współdzielone z kopią grafu
+        self._shared: Set[Node] = set()
+        # liczba wierzchołków o danym stopniu: stopień -> liczba wierzchołków
+        self._degree_count: Dict[int, int] = {}
+        # liczba krawędzi o wadze różnej od 1
+        self._weighted_edges = 0
         self.separator = ""
         self.name = ""
+        self.directed = False
 
         self.clear()
         self.add_nodes(count=size)
@@ -32,6 +65,9 @@ class Graph(ABC):
         """Tworzy nowe wierzchołki"""
         for i in range(len(self) + 1, len(self) + 1 + count):
             self.nodes.add(i)
+            self._adj[i] = {}
+        if count > 0:
+            self._degree_count[0] = self._degree_count.get(0, 0) + count
 
     def __len__(self) -> int:
         return len(self.nodes)
@@ -45,9 +81,80 @@ class Graph(ABC):
     def clear(self) -> None:
         self.nodes.clear()
         self.edges.clear()
+        self._adj.clear()
+        self._shared.clear()
+        self._degree_count.clear()
+        self._weighted_edges = 0
+
+    def copy(self, share: bool = False) -> Graph:
+        """
+        Kopiuje wierzchołki, krawędzie i indeksy sąsiedztwa (bez copy.deepcopy)
+            share:
+                wiersze indeksów i obiekty Edge są współdzielone z oryginałem,
+                wiersz jest kopiowany przy pierwszej zmianie (copy-on-write).
+                Wag krawędzi nie należy wtedy zmieniać w miejscu.
+        """
+        g = copy.copy(self)
+        g.nodes = set(self.nodes)
+        g._degree_count = dict(self._degree_count)
+        if share:
+            g.edges = set(self.edges)
+            for name in self._index_names:
+                setattr(g, name, dict(getattr(self, name)))
+            self._shared.update(self.nodes)
+            g._shared = set(self.nodes)
+        else:
+            clones = {
+                edge: Edge(edge.begin, edge.end, edge.weight) for edge in self.edges
+            }
+            g.edges = set(clones.values())
+            for name in self._index_names:
+                index = {
+                    node: {neighbour: clones[edge] for neighbour, edge in row.items()}
+                    for node, row in getattr(self, name).items()
+                }
+                setattr(g, name, index)
+            g._shared = set()
+        return g
+
+    def _unshare(self, *nodes: Node) -> None:
+        """Kopiuje współdzielone wiersze indeksów przed ich modyfikacją"""
+        for node in nodes:
+            if node in self._shared:
+                self._shared.discard(node)
+                for name in self._index_names:
+                    index = getattr(self, name)
+                    index[node] = dict(index[node])
 
     def is_weighted_graph(self) -> bool:
-        return any(edge.weight != 1 for edge in self.edges)
+        """Czy któraś krawędź ma wagę różną od 1"""
+        return self._weighted_edges > 0
+
+    def _count_degree(self, node: Node, delta: int) -> None:
+        """Aktualizuje licznik stopni; wywoływać przed zmianą wiersza indeksu"""
+        degree = len(self._adj[node])
+        if self._degree_count[degree] == 1:
+            del self._degree_count[degree]
+        else:
+            self._degree_count[degree] -= 1
+        self._degree_count[degree + delta] = (
+            self._degree_count.get(degree + delta, 0) + 1
+        )
+
+    def _count_degrees(self, nodes: Iterable[Node], delta: int) -> None:
+        """Dodaje (delta=1) lub usuwa (delta=-1) stopnie wierzchołków z licznika"""
+        for node in nodes:
+            degree = len(self._adj[node])
+            count = self._degree_count.get(degree, 0) + delta
+            if count:
+                self._degree_count[degree] = count
+            else:
+                del self._degree_count[degree]
+
+    def _count_weight(self, edge: Edge, delta: int) -> None:
+        """Aktualizuje licznik krawędzi ważonych"""
+        if edge.weight != 1:
+            self._weighted_edges += delta
 
     @abstractmethod
     def get_all_possible_edges(self) -> Set[Edge]:
@@ -58,31 +165,131 @@ class Graph(ABC):
 
     def node_neighbours(self, node: Node) -> Set[Node]:
         """Returns nodes adjacent to a given node"""
-        return set([edge.end for edge in self.node_edges(node)])
+        return set(self._adj[node])
 
     def node_edges(self, node: Node) -> Set[Edge]:
         """Returns set of edges adjacent to the given node"""
-        return set(
-            [edge for edge in self.get_all_possible_edges() if edge.begin == node]
-        )
+        return set(self.edge_to_node(node, end) for end in self._adj[node])
+
+    def node_weights(self, node: Node) -> Dict[Node, Weight]:
+        """Returns weights of edges from the given node, keyed by neighbour"""
+        return {end: edge.weight for end, edge in self._adj[node].items()}
 
     def node_degree(self, node: Node) -> int:
         """Returns degree of the selected node"""
-        return len(self.node_edges(node))
+        return len(self._adj[node])
 
     def edge_to_node(self, begin: Node, end: Node) -> Edge:
         """Get edge that connects given two nodes"""
-        edge = [
-            e
-            for e in self.get_all_possible_edges()
-            if e.begin == begin and e.end == end
-        ][0]
+        edge = self._adj[begin][end]
+        # w grafie prostym krawędź jest zapisana raz, w kolejności begin < end
+        if edge.begin != begin:
+            edge = Edge(begin, end, edge.weight)
         return edge
 
     @abstractmethod
     def connect(self, node1: Node, node2: Node, weight: Weight = 1) -> None:
         """Tworzy krawędż między wierzchołkiem node1 a node2"""
 
+    def connect_many(self, edges: Union[EdgeTable, Iterable[Tuple[Node, ...]]]) -> None:
+        """
+        Tworzy wiele krawędzi naraz
+            edges:
+                EdgeTable albo krotki (node1, node2) lub (node1, node2, weight)
+        Wierzchołki są sprawdzane jedną operacją na tablicach, a liczniki
+        stopni i wag aktualizowane raz dla całej porcji
+        """
+        if not isinstance(edges, EdgeTable):
+            edges = list(edges)
+            weights = [e[2] if len(e) > 2 else 1 for e in edges]
+            # przy wagach różnych typów (np. int i float) tablica obiektów,
+            # żeby każda krawędź zachowała typ podanej wagi
+            if len({type(w) for w in weights}) > 1:
+                weights = np.array(weights, dtype=object)
+            edges = EdgeTable(
+                [e[0] for e in edges], [e[1] for e in edges], weights if edges else None
+            )
+        if len(edges) == 0:
+            return
+
+        begin, end, weight = edges.begin, edges.end, edges.weight
+        n = len(self)
+        if min(begin.min(), end.min()) < 1 or max(begin.max(), end.max()) > n:
+            raise ValueError
+        if not self.directed:
+            begin, end = np.minimum(begin, end), np.maximum(begin, end)
+
+        # przy powtórzeniach zostaje ostatnia krawędź, tak jak przy connect
+        key = begin * (n + 1) + end
+        _, last = unique(key[::-1], return_index=True)
+        keep = np.sort(len(key) - 1 - last)
+        begin, end, weight = begin[keep], end[keep], weight[keep]
+
+        touched = unique(np.concatenate((begin, end))).tolist()
+        self._unshare(*touched)
+        self._count_degrees(touched, -1)
+        self._weighted_edges += int(np.count_nonzero(weight != 1))
+        self._insert_edges(begin.tolist(), end.tolist(), weight.tolist())
+        self._count_degrees(touched, 1)
+
+    @abstractmethod
+    def _insert_edges(
+        self, begins: List[Node], ends: List[Node], weights: List[Weight]
+    ) -> None:
+        """Wstawia sprawdzone krawędzie do zbioru krawędzi i indeksów"""
+
+    def disconnect_many(self, pairs: Union[EdgeTable, Iterable[Tuple]]) -> None:
+        """
+        Usuwa wiele krawędzi naraz
+            pairs:
+                EdgeTable albo krotki (node1, node2); każda krawędź musi istnieć
+        """
+        if not isinstance(pairs, EdgeTable):
+            pairs = list(pairs)
+            pairs = EdgeTable([p[0] for p in pairs], [p[1] for p in pairs])
+        if len(pairs) == 0:
+            return
+
+        begin, end = pairs.begin, pairs.end
+        n = len(self)
+        if min(begin.min(), end.min()) < 1 or max(begin.max(), end.max()) > n:
+            raise ValueError
+        if not self.directed:
+            begin, end = np.minimum(begin, end), np.maximum(begin, end)
+        key = unique(begin * (n + 1) + end)
+        begin, end = np.divmod(key, n + 1)
+
+        touched = unique(np.concatenate((begin, end))).tolist()
+        self._unshare(*touched)
+        self._count_degrees(touched, -1)
+        try:
+            self._delete_edges(begin.tolist(), end.tolist())
+        finally:
+            self._count_degrees(touched, 1)
+
+    @abstractmethod
+    def _delete_edges(self, begins: List[Node], ends: List[Node]) -> None:
+        """Usuwa istniejące krawędzie ze zbioru krawędzi i indeksów"""
+
+    def from_edge_arrays(
+        self,
+        begin: Iterable[Node],
+        end: Iterable[Node],
+        weight: Iterable[Weight] = None,
+        size: int = None,
+    ) -> Graph:
+        """
+        Wypełnianie grafu z tablic początków, końców i wag krawędzi
+        Domyślnie liczba wierzchołków to największy numer wierzchołka
+        """
+        edges = EdgeTable(begin, end, weight)
+        if size is None:
+            size = int(max(edges.begin.max(), edges.end.max())) if len(edges) else 0
+        self.clear()
+        self.add_nodes(size)
+        self.connect_many(edges)
+        return self
+
     @abstractmethod
     def disconnect(self, node1: Node, node2: Node) -> None:
         """Usuwa krawędż między wierzchołkiem node1 a node2"""
@@ -93,26 +300,36 @@ class Graph(ABC):
 
     def to_adjacency_list(self) -> AdjacencyList:
         """Zwraca graf w postaci listy sąsiedztwa"""
-        adj_l = {
-            (node): (
-                set(
-                    [
-                        edge.end
-                        for edge in self.get_all_possible_edges()
-                        if edge.begin == node
-                    ]
-                )
-            )
-            for node in self.nodes
-        }
+        adj_l = {node: set(self._adj[node]) for node in self.nodes}
         return adj_l
 
+    def freeze(self) -> CSRGraph:
+        """Zwraca niezmienną migawkę grafu w formacie CSR"""
+        indptr = [0]
+        indices = []
+        weights = []
+        for node in range(1, len(self) + 1):
+            row = self._adj[node]
+            for neighbour in sorted(row):
+                indices.append(neighbour - 1)
+                weights.append(row[neighbour].weight)
+            indptr.append(len(indices))
+        return CSRGraph(indptr, indices, weights, directed=self.directed)
+
+    def to_edge_table(self) -> EdgeTable:
+        """Zwraca krawędzie grafu w postaci struktury tablic"""
+        return EdgeTable.from_edges(self.edges)
+
     @abstractmethod
-    def to_adjacency_matrix(self) -> AdjacencyMatrix:
+    def to_adjacency_matrix(
+        self, matrix_format: str = "list", dtype: Any = None
+    ) -> AdjacencyMatrix:
         """Zwraca graf w postaci macierzy sąsiedztwa"""
 
     @abstractmethod
-    def to_incidence_matrix(self) -> IncidenceMatrix:
+    def to_incidence_matrix(
+        self, matrix_format: str = "list", dtype: Any = None
+    ) -> IncidenceMatrix:
         """Zwraca graf w postaci macierzy incydencji"""
 
     def from_adjacency_list(self, adjacency_list: AdjacencyList) -> Graph:
@@ -122,17 +339,23 @@ class Graph(ABC):
         size = len(adjacency_list)
         self.add_nodes(size)
 
-        for node, neighbours in adjacency_list.items():
-            for neighbour in neighbours:
-                self.connect(node, neighbour)
+        self.connect_many(
+            (node, neighbour)
+            for node, neighbours in adjacency_list.items()
+            for neighbour in neighbours
+        )
         return self
 
     @abstractmethod
-    def from_adjacency_matrix(self, adj_m: AdjacencyMatrix) -> Graph:
+    def from_adjacency_matrix(
+        self, adj_m: AdjacencyMatrix, matrix_format: str = "list", size: int = None
+    ) -> Graph:
         """Wypełnianie grafu z macierzy sąsiedztwa"""
 
     @abstractmethod
-    def from_incidence_matrix(self, inc_m: IncidenceMatrix) -> Graph:
+    def from_incidence_matrix(
+        self, inc_m: IncidenceMatrix, matrix_format: str = "list", size: int = None
+    ) -> Graph:
         """Wypełnianie grafu z macierzy incydencji"""
 
     def save(
@@ -149,6 +372,8 @@ class Graph(ABC):
                 al - lista sąsiedztwa
                 am - macierz sąsiedztwa
                 im - macierz incydencji
+                npg - binarny format CSR (CSRGraph.load mapuje go do pamięci)
+                el - lista krawędzi "u v [w]", zapisywana strumieniowo
                 gv - dot format
                 png - plik graficzny http://www.graphviz.org/
             engine:
@@ -171,6 +396,17 @@ class Graph(ABC):
             with open(filename, "w") as f:
                 f.write(str(self.to_incidence_matrix()))
 
+        elif file_format == "npg":
+            filename += ".npg"
+            self.freeze().save(filename)
+
+        elif file_format == "el":
+            filename += ".el"
+            with open(filename, "w") as f:
+                f.write(f"# {len(self)} {len(self.edges)}\n")
+                for chunk in chunked(self._edge_list_lines(), EDGE_LIST_CHUNK):
+                    f.write("".join(chunk))
+
         elif file_format == "gv":
             with open(f"{filename}.{file_format}", "w") as f:
                 # header
@@ -189,10 +425,7 @@ class Graph(ABC):
                             f.write(f'{node} [style=filled, color="{color}80"];\n')
 
                 # detached nodes
-                connected_nodes = [edge.begin for edge in self.get_all_possible_edges()]
-                detached_nodes = [
-                    node for node in self.nodes if node not in connected_nodes
-                ]
+                detached_nodes = [node for node in self.nodes if not self._adj[node]]
                 for node in detached_nodes:
                     if alphabetical:
                         node = number_to_alpha(node)
@@ -202,12 +435,13 @@ class Graph(ABC):
                 if edge_labels is None:
                     edge_labels = {}
 
+                weighted = self.is_weighted_graph()
                 for edge in self.edges:
                     n1 = edge.begin
                     n2 = edge.end
                     label = (
                         f'[label="{edge.weight if (n1, n2) not in edge_labels else edge_labels[(n1, n2)]}",weight="{edge.weight}"]'
-                        if self.is_weighted_graph()
+                        if weighted
                         else ""
                     )
                     if alphabetical:
@@ -230,7 +464,26 @@ class Graph(ABC):
             os.system(f"rm {filename}")
 
     def load(self, filename: str) -> None:
-        """Wczytaj graf z pliku w formacie .al, .am lub .im"""
+        """
+        Wczytaj graf z pliku w formacie .al, .am, .im, .npg lub .el
+        Graf jest zawsze budowany w pamięci, także z pliku .npg; żeby
+        korzystać z pliku .npg bez wczytywania go, użyj CSRGraph.load
+        (mapowanie pliku do pamięci)
+        """
+        if filename.endswith(".el"):
+            with open(filename, "r") as f:
+                self.load_edge_list(f)
+            return
+
+        if filename.endswith(".npg"):
+            # cały plik i tak jest czytany, więc mapowanie nic nie daje
+            csr = CSRGraph.load(filename, mmap=False)
+            if csr.directed != self.directed:
+                kind = "skierowany" if csr.directed else "nieskierowany"
+                raise ValueError(f"Plik {filename} zawiera graf {kind}")
+            edges = csr.to_edge_table()
+            self.from_edge_arrays(edges.begin, edges.end, edges.weight, len(csr))
+            return
 
         with open(filename, "r") as f:
             data = eval(f.read())
@@ -241,97 +494,241 @@ class Graph(ABC):
             elif filename.endswith(".im"):
                 self.from_incidence_matrix(data)
 
-    def add_random_edges(self, count: int = 1) -> None:
-        """Tworzy określoną ilość losowych krawędzi"""
-        if len(self.edges) + count > len(self) * (len(self) - 1) / 2:
+    def _edge_list_lines(self) -> Iterator[str]:
+        if self.is_weighted_graph():
+            for edge in self.edges:
+                yield f"{edge.begin} {edge.end} {edge.weight}\n"
+        else:
+            for edge in self.edges:
+                yield f"{edge.begin} {edge.end}\n"
+
+    def load_edge_list(self, lines: Iterable[str]) -> Graph:
+        """
+        Wypełnianie grafu z listy krawędzi "u v [w]" czytanej porcjami
+        Nagłówek "# n m" tworzy n wierzchołków, brakujące wierzchołki są
+        dodawane w miarę wczytywania krawędzi
+        """
+        self.clear()
+        lines = iter(lines)
+        first = next(lines, "")
+        header = first.lstrip("#").split()
+        if first.startswith("#") and len(header) == 2 and header[0].isdigit():
+            self.add_nodes(int(header[0]))
+        else:
+            lines = itertools.chain([first], lines)
+
+        for chunk in chunked(read_edge_list(lines), EDGE_LIST_CHUNK):
+            top = max(max(begin, end) for begin, end, _ in chunk)
+            if top > len(self):
+                self.add_nodes(top - len(self))
+            self.connect_many(chunk)
+        return self
+
+    def add_random_edges(self, count: int = 1, seed: int = None) -> None:
+        """
+        Tworzy określoną ilość losowych krawędzi
+        Nowe krawędzie są losowane jednakowo spośród wszystkich par
+        niepołączonych wierzchołków (model G(n, m))
+        """
+        existing = self.to_edge_table()
+        # pętle nie mają numeru pary (nie są losowane), więc są pomijane
+        no_loop = existing.begin != existing.end
+        begin, end = existing.begin[no_loop], existing.end[no_loop]
+        free = self._pair_count() - len(begin)
+        if count > free:
             raise ValueError(
-                f"Zbyt duża liczba krawędzi dla grafu prostego o {len(self)} wierzchołkach"
+                f"Zbyt duża liczba krawędzi dla grafu o {len(self)} wierzchołkach"
             )
-        c = 0
-        while c < count:
-            n1 = random.randint(1, len(self))
-            n2 = random.randint(1, len(self))
+        # k-ty wolny numer pary to k + liczba zajętych numerów, które go poprzedzają
+        taken = np.sort(self._encode_pairs(begin, end))
+        shifted = taken - np.arange(len(taken))
+        k = sample_distinct(free, count, random_state(seed))
+        k += np.searchsorted(shifted, k, side="right")
+        self.connect_many(EdgeTable(*self._decode_pairs(k)))
+
+    def connect_random(self, p: float, seed: int = None) -> None:
+        """
+        Łączy wierzchołki tak, aby prawdopodobieństwo istnienia krawędzi
+        między dowolnymi dwoma wierzchołkami wynosiło p (model G(n, p))
+        Losowane są tylko numery wybranych par (patrz functions.sample_indices),
+        a nie wszystkie pary, więc czas to O(n + m)
+        """
+        k = sample_indices(self._pair_count(), p, random_state(seed))
+        self.connect_many(EdgeTable(*self._decode_pairs(k)))
 
-            if n1 != n2 and not self.is_connected(n1, n2):
-                self.connect(n1, n2)
-                c += 1
+    def _pair_count(self) -> int:
+        """Liczba par wierzchołków, które może łączyć krawędź"""
+        n = len(self)
+        return n * (n - 1) if self.directed else n * (n - 1) // 2
 
-    @abstractmethod
-    def connect_random(self, p: float) -> None:
+    def _encode_pairs(self, begin: np.ndarray, end: np.ndarray) -> np.ndarray:
         """
-        Łączy wierzchołki tak, aby prawdopodobieństwo istnienia krawędzi
-        między dowolnymi dwoma wierzchołkami wynosiło p
-        iteracja po każdej kombinacji bez powtórzeń 2 wierzchołków
+        Numery par wierzchołków z przedziału [0, _pair_count()), begin != end
+        W grafie prostym pary begin < end są numerowane wierszami, w skierowanym
+        para numer k to (k // (n - 1), k % (n - 1)) z pominięciem pętli
         """
+        n = len(self)
+        begin = np.asarray(begin, dtype=np.int64) - 1
+        end = np.asarray(end, dtype=np.int64) - 1
+        if self.directed:
+            return begin * (n - 1) + end - (end > begin)
+        return begin * (2 * n - begin - 1) // 2 + end - begin - 1
+
+    def _decode_pairs(self, k: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Odwrotność _encode_pairs: początki i końce krawędzi o numerach k"""
+        n = len(self)
+        if self.directed:
+            begin, r = np.divmod(k, max(n - 1, 1))
+            end = r + (r >= begin)
+        else:
+            i = np.arange(n, dtype=np.int64)
+            first = i * (2 * n - i - 1) // 2
+            begin = np.searchsorted(first, k, side="right") - 1
+            end = k - first[begin] + begin + 1
+        return begin + 1, end + 1
 
     def graph_sequence(self) -> List[int]:
         """Zwraca ciąg graficzny"""
-        return sorted([len(v) for v in self.to_adjacency_list().values()], reverse=True)
+        return [
+            degree
+            for degree in sorted(self._degree_count, reverse=True)
+            for _ in range(self._degree_count[degree])
+        ]
 
     @abstractmethod
     def components(self) -> Dict[int, int]:
         """Zwraca słownik złożony z wierzchołków i spójnych składowych do których należą"""
 
     def components_r(
-        self, nr: int, v: int, comp: Dict[int, int], g: AdjacencyList
+        self,
+        nr: int,
+        v: int,
+        comp: Dict[int, int],
+        g: AdjacencyList,
+        visited: Set[Node] = None,
     ) -> None:
-        """Rekursywne przeszukiwanie wgłąb"""
-        for u in g[v]:
-            if comp[u] == -1:
+        """
+        Oznacza numerem nr wierzchołki nieoznaczone osiągalne z v
+            visited:
+                wierzchołki oznaczone, uzupełniany w trakcie; przy wywołaniach
+                w pętli po kolejnych v należy przekazywać ten sam zbiór, bo bez
+                niego jest on za każdym razem budowany z comp w czasie O(n)
+        """
+        if visited is None:
+            visited = {u for u, c in comp.items() if c != -1}
+            visited.discard(v)
+        for u, entered in dfs_events(g, v, visited):
+            if entered:
                 comp[u] = nr
-                self.components_r(nr, u, comp, g)
 
     def component_list(self) -> Dict[int, List[int]]:
         """Zwraca słownik złożony ze spoójnych składowych i listy wierzchołków które do nich należą."""
-        comp = self.components()
-        components = {}
-        for v, c in comp.items():
-            if c in components:
-                components[c].append(v)
-            else:
-                components[c] = [v]
-        for vertices in components.values():
-            vertices.sort()
-        return components
+        return component_lists(self.components())
 
     def largest_component(self) -> Tuple[int, List[int]]:
         """Zwraca największą spójną składową"""
         return max(self.component_list().items(), key=lambda t: len(t[1]))
 
     def from_graph_sequence(self, seq: List[int]) -> Graph:
-        """Tworzenie grafu z ciągu graficznego"""
-        if is_valid_graph_sequence(seq):
-            self.clear()
-            self.add_nodes(len(seq))
-            degree_list = [[v + 1, d] for v, d in enumerate(seq)]
-            while True:
-                degree_list.sort(key=lambda x: x[1], reverse=True)
-                degree_list = [[v, d] for v, d in degree_list if d != 0]
-                if len(degree_list) == 0:
-                    break
-                for i in range(1, degree_list[0][1] + 1):
-                    self.connect(degree_list[0][0], degree_list[i][0])
-                    degree_list[0][1] -= 1
-                    degree_list[i][1] -= 1
-            return self
-        else:
+        """
+        Tworzenie grafu z ciągu graficznego (algorytm Havla-Hakimiego)
+        Wierzchołki są trzymane w kubełkach według pozostałego stopnia,
+        więc nie trzeba sortować ciągu w każdym kroku - czas to O(n + m)
+        """
+        if not is_valid_graph_sequence(seq):
             raise ValueError("Niepoprawny ciąg graficzny")
+        self.clear()
+        self.add_nodes(len(seq))
+
+        # kolejność w kubełku odpowiada kolejności po stabilnym sortowaniu
+        # malejąco według stopnia, tak jak w wersji sortującej cały ciąg
+        buckets = [collections.deque() for _ in range(len(seq))]
+        for v, d in enumerate(seq, 1):
+            if d > 0:
+                buckets[d].append(v)
+        begins = []
+        ends = []
+        top = len(seq) - 1
+        while True:
+            while top > 0 and not buckets[top]:
+                top -= 1
+            if top == 0:
+                break
+            v = buckets[top].popleft()
+            # v łączy się z top kolejnymi wierzchołkami o największych stopniach,
+            # zdejmowanymi z początków kubełków od najwyższego
+            taken = []
+            needed = top
+            d = top
+            while needed > 0:
+                part = [
+                    buckets[d].popleft() for _ in range(min(needed, len(buckets[d])))
+                ]
+                taken.append((d, part))
+                needed -= len(part)
+                d -= 1
+            for d, part in taken:
+                begins.extend([v] * len(part))
+                ends.extend(part)
+                if d > 1:
+                    buckets[d - 1].extendleft(reversed(part))
+        self.connect_many(EdgeTable(begins, ends))
+        return self
+
+    def randomize(
+        self, n_switches: int, seed: int = None, connected: bool = False
+    ) -> int:
+        """
+        Losowo zamienia krawędzie: a-b c-d -> a-d c-b, zachowując stopnie
+        wierzchołków (w grafie skierowanym a->b c->d -> a->d c->b)
+        Krawędzie są losowane z tablicy w O(1), a zamiany wykonywane na tablicy
+        i zbiorze par, więc graf jest zmieniany raz na koniec (patrz _EdgeSwapper)
+        Wagi przechodzą razem z krawędziami: a-d dostaje wagę a-b, c-b wagę c-d
+            connected:
+                graf pozostaje spójny - zamiany są wykonywane w oknach, spójność
+                sprawdzana po każdym oknie, a okno wycofywane, jeśli ją zepsuło;
+                okno rośnie dwukrotnie po udanym oknie i maleje po nieudanym,
+                więc liczba sprawdzeń spójności jest rzędu log(n_switches)
+        Zwraca liczbę wykonanych zamian (mniejszą niż n_switches, jeśli
+        nie udało się ich znaleźć w 100 * n_switches próbach)
+        """
+        if n_switches <= 0:
+            return 0
+        if len(self.edges) < 2:
+            raise ValueError("Za mało krawędzi do zamiany")
+        if connected and not self.is_connected_graph():
+            raise ValueError("Graf nie jest spójny")
+
+        table = self.to_edge_table()
+        swapper = _EdgeSwapper(table, len(self), self.directed, random_state(seed))
+        if not connected:
+            done = swapper.swap(n_switches, 100 * n_switches)
+            self._apply_changes(*swapper.changes())
+            return done
+
+        done = 0
+        tries = 100 * n_switches
+        window = 1
+        while done < n_switches and tries > 0:
+            window = min(window, n_switches - done)
+            performed = swapper.swap(window, min(tries, 100 * window))
+            tries -= swapper.tries
+            if performed == 0:
+                break
+            self._apply_changes(*swapper.changes())
+            if self.is_connected_graph():
+                swapper.checkpoint()
+                done += performed
+                window *= 2
+            else:
+                self._apply_changes(*swapper.changes(undo=True))
+                swapper.rollback()
+                window = max(1, window // 2)
+        return done
 
-    def randomize(self, n_switches: int) -> None:
-        """Losowo zamienia krawędzie: a-b c-d -> a-d b-c"""
-        while n_switches > 0:
-            r1, r2 = random.choices(tuple(self.edges), k=2)
-            a, b = r1.begin, r1.end
-            c, d = r2.begin, r2.end
-            if a == d or b == c:
-                continue
-            if self.is_connected(a, d) or self.is_connected(b, c):
-                continue
-            self.disconnect(a, b)
-            self.disconnect(c, d)
-            self.connect(a, d)
-            self.connect(b, c)
-            n_switches -= 1
+    def _apply_changes(self, removed: EdgeTable, added: EdgeTable) -> None:
+        self.disconnect_many(removed)
+        self.connect_many(added)
 
     def is_connected_graph(self) -> bool:
         """Czy jest to graf spójny"""
@@ -347,6 +744,121 @@ class Graph(ABC):
         else:
             return False
 
-    def assign_random_weights(self, min_weight=1, max_weight=10) -> None:
-        for edge in self.edges:
-            edge.weight = random.randint(min_weight, max_weight)
+    def assign_random_weights(
+        self, min_weight=1, max_weight=10, seed: int = None
+    ) -> None:
+        rng = random if seed is None else random.Random(seed)
+        for edge in list(self.edges):
+            self.connect(edge.begin, edge.end, rng.randint(min_weight, max_weight))
+
+
+class _EdgeSwapper:
+    """
+    Krawędzie grafu w listach begin/end/weight ze zbiorem kodów par do
+    sprawdzania sąsiedztwa; wykonuje losowe zamiany krawędzi zachowujące stopnie
+    Para (u, v) ma kod u * (n + 1) + v, w grafie prostym dla u < v
+    Wagi zostają przy numerach krawędzi, zmieniają się tylko ich końce
+    """
+
+    def __init__(
+        self, table: EdgeTable, size: int, directed: bool, rng: np.random.RandomState
+    ) -> None:
+        self.begin = table.begin.tolist()
+        self.end = table.end.tolist()
+        self.weight = table.weight
+        self.base = size + 1
+        self.directed = directed
+        self.rng = rng
+        self.codes = self.encode(table.begin, table.end).tolist()
+        self.present = set(self.codes)
+        self.tries = 0
+        self.checkpoint()
+
+    def encode(self, begin: np.ndarray, end: np.ndarray) -> np.ndarray:
+        if not self.directed:
+            begin, end = np.minimum(begin, end), np.maximum(begin, end)
+        return begin * self.base + end
+
+    def checkpoint(self) -> None:
+        """Zapamiętuje bieżący stan krawędzi (do changes i rollback)"""
+        self.saved = (self.begin[:], self.end[:], self.codes[:])
+
+    def rollback(self) -> None:
+        """Wraca do stanu z ostatniego checkpoint"""
+        begin, end, codes = self.saved
+        self.begin, self.end, self.codes = begin[:], end[:], codes[:]
+        self.present = set(codes)
+
+    def changes(self, undo: bool = False) -> Tuple[EdgeTable, EdgeTable]:
+        """
+        Krawędzie do usunięcia z grafu i do dodania do niego, żeby przejść
+        od stanu z ostatniego checkpoint do bieżącego (albo odwrotnie dla undo)
+        """
+        before = self.saved
+        after = (self.begin, self.end, self.codes)
+        if undo:
+            before, after = after, before
+        return _diff(before, after, self.weight)
+
+    def swap(self, count: int, max_tries: int) -> int:
+        """Wykonuje do count zamian w co najwyżej max_tries próbach"""
+        begin, end, codes, present = self.begin, self.end, self.codes, self.present
+        base = self.base
+        directed = self.directed
+        m = len(begin)
+        done = 0
+        self.tries = 0
+        while done < count and self.tries < max_tries:
+            batch = min(max(2 * (count - done), 64), max_tries - self.tries)
+            first = self.rng.randint(0, m, batch).tolist()
+            second = self.rng.randint(0, m, batch).tolist()
+            # w grafie prostym druga krawędź jest losowo odwracana, żeby obie
+            # zamiany a-b c-d -> a-d c-b i a-b c-d -> a-c d-b były możliwe
+            flip = self.rng.randint(0, 2, batch).tolist()
+            for i, j, f in zip(first, second, flip):
+                self.tries += 1
+                a, b = begin[i], end[i]
+                c, d = begin[j], end[j]
+                if f and not directed:
+                    c, d = d, c
+                if i == j or a == d or c == b:
+                    continue
+                new1 = a * base + d if directed or a < d else d * base + a
+                new2 = c * base + b if directed or c < b else b * base + c
+                if new1 in present or new2 in present:
+                    continue
+                present.discard(codes[i])
+                present.discard(codes[j])
+                present.add(new1)
+                present.add(new2)
+                begin[i], end[i], codes[i] = a, d, new1
+                begin[j], end[j], codes[j] = c, b, new2
+                done += 1
+                if done == count:
+                    break
+        return done
+
+
+def _diff(
+    before: Tuple, after: Tuple, weight: np.ndarray
+) -> Tuple[EdgeTable, EdgeTable]:
+    """
+    Krawędzie do usunięcia i do dodania, żeby zamienić krawędzie before na after
+    before i after to trójki tablic (begin, end, code) dla tych samych numerów
+    krawędzi, a weight to wagi tych krawędzi; dodawane są też pary, które
+    zostały, ale trafiły do krawędzi o innej wadze
+    """
+    old_begin, old_end, old_code = (np.asarray(a, dtype=np.int64) for a in before)
+    new_begin, new_end, new_code = (np.asarray(a, dtype=np.int64) for a in after)
+    weight = np.asarray(weight)
+    removed = ~is_in_sorted(old_code, np.sort(new_code))
+    # dla każdej nowej pary: numer krawędzi, która miała ją przed zamianami
+    order = np.argsort(old_code)
+    pos = order[
+        np.minimum(np.searchsorted(old_code, new_code, sorter=order), len(order) - 1)
+    ]
+    added = (old_code[pos] != new_code) | (weight[pos] != weight)
+    return (
+        EdgeTable(old_begin[removed], old_end[removed]),
+        EdgeTable(new_begin[added], new_end[added], weight[added]),
+    )
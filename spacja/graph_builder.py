@@ -1,144 +1,330 @@
 import random
 import os
+import multiprocessing
+from typing import Any, Callable, Iterator, Tuple, Type, Union
 
+import numpy as np
+
+from spacja.complete_graph import CompleteGraph
 from spacja.directed_graph import DirectedGraph
-from spacja.functions import is_valid_graph_sequence
+from spacja.functions import is_valid_graph_sequence, random_state, unique, is_in_sorted
+from spacja.graph import Graph
+from spacja.helper_structures import EdgeTable
 from spacja.simple_graph import SimpleGraph
 
 
+# liczba bitów ziaren grafów w ensemble; przy 32 bitach w dużych zbiorach
+# powtórzenia ziaren (a więc i identyczne grafy) byłyby prawdopodobne
+ENSEMBLE_SEED_BITS = 64
+
+
+def _generate(task: Tuple) -> Tuple[Type[Graph], int, Any, Any]:
+    """
+    Tworzy jeden graf w procesie roboczym i zwraca go jako tablice krawędzi
+    razem ze współrzędnymi (x, y) wierzchołków, jeśli graf je ma
+    CompleteGraph jest zwracany w całości: zajmuje O(n) pamięci, a nie da się
+    go odtworzyć z samych krawędzi
+    """
+    generator, args, kwargs, seed = task
+    g = generator(*args, seed=seed, **kwargs)
+    if isinstance(g, CompleteGraph):
+        return type(g), len(g), g, None
+    coordinates = (g.x, g.y) if hasattr(g, "x") and hasattr(g, "y") else None
+    return type(g), len(g), g.to_edge_table(), coordinates
+
+
 class GraphBuilder:
-    """Tworzy różne rodzaje grafów"""
+    """
+    Tworzy różne rodzaje grafów
+    Metody przyjmują seed; bez niego korzystają z modułu random
+    """
 
     @staticmethod
-    def get_eulerian_graph(size: int = None) -> SimpleGraph:
-        """Losowy graf Eulerowski"""
+    def get_eulerian_graph(
+        size: int = None, seed: int = None, average_degree: int = None
+    ) -> SimpleGraph:
+        """
+        Losowy graf Eulerowski, budowany od razu jako spójny i o parzystych stopniach
+        Najpierw losowy cykl Hamiltona (graf jest spójny, wszystkie stopnie 2),
+        potem dokładane są losowe cykle z nowych krawędzi - każdy zwiększa
+        stopnie swoich wierzchołków o 2, więc pozostają parzyste
+            average_degree:
+                docelowy średni stopień (domyślnie losowy z przedziału
+                [2, size - 1], jak dawniej stopnie wierzchołków)
+        Z cyklu pomijane są wierzchołki, które dałyby istniejącą krawędź; jeśli
+        100 razy z rzędu nie uda się zbudować cyklu (graf bliski pełnego),
+        graf jest zwracany z mniejszą liczbą krawędzi
+        """
+        rng = random if seed is None else random.Random(seed)
         if size is None:
-            size = random.randint(2, 16)
-        while True:
-            seq = []
-            for d in range(size):
-                d = random.randint(2, size - 1)
-                seq.append(d - d % 2)
-            if is_valid_graph_sequence(seq):
-                break
-
-        g = SimpleGraph().from_graph_sequence(seq)
-        while True:
-            if g.is_connected_graph():
-                break
-            g.randomize(size)
-        return g
+            size = rng.randint(3, 16)
+        if size < 3:
+            raise ValueError("Graf Eulerowski musi mieć co najmniej 3 wierzchołki")
+        if average_degree is None:
+            average_degree = rng.randint(2, size - 1)
+
+        nodes = list(range(1, size + 1))
+        rng.shuffle(nodes)
+        begins = nodes
+        ends = nodes[1:] + nodes[:1]
+        present = {(min(b, e), max(b, e)) for b, e in zip(begins, ends)}
+
+        remaining = size * (average_degree - 2) // 2
+        failures = 0
+        while remaining >= 3 and failures < 100:
+            length = rng.randint(3, min(size, remaining))
+            # wierzchołki, które utworzyłyby istniejącą krawędź, są pomijane
+            cycle = []
+            for v in rng.sample(range(1, size + 1), length):
+                if not cycle or (min(cycle[-1], v), max(cycle[-1], v)) not in present:
+                    cycle.append(v)
+            while (
+                len(cycle) >= 3
+                and (min(cycle[-1], cycle[0]), max(cycle[-1], cycle[0])) in present
+            ):
+                cycle.pop()
+            if len(cycle) < 3:
+                failures += 1
+                continue
+            failures = 0
+            present.update(
+                (min(b, e), max(b, e)) for b, e in zip(cycle, cycle[1:] + cycle[:1])
+            )
+            remaining -= len(cycle)
+
+        begins, ends = zip(*present)
+        return SimpleGraph().from_edge_arrays(begins, ends, size=size)
 
     @staticmethod
-    def get_k_regular_graph(size, k, connected=False) -> SimpleGraph:
-        """Graf z wierzchołkami o tym samym stopniu"""
-        seq = [k for _ in range(size)]
-        g = SimpleGraph().from_graph_sequence(seq)
+    def get_k_regular_graph(size, k, connected=False, seed: int = None) -> SimpleGraph:
+        """
+        Graf z wierzchołkami o tym samym stopniu
+            connected:
+                losowy graf spójny - patrz get_connected_k_regular_graph
+        """
         if connected:
-            if k < 2 and size != 2:
-                raise ValueError("Nie da się stworzyć zadanego grafu.")
-            while True:
-                if g.is_connected_graph():
-                    break
-                g.randomize(size)
+            return GraphBuilder.get_connected_k_regular_graph(size, k, seed)
+        seq = [k for _ in range(size)]
+        return SimpleGraph().from_graph_sequence(seq)
+
+    @staticmethod
+    def get_connected_k_regular_graph(
+        size, k, seed: int = None, swaps_per_edge: int = 10
+    ) -> SimpleGraph:
+        """
+        Losowy spójny graf k-regularny
+        Zaczyna od grafu cyklicznego: wierzchołek i jest połączony z i +- 1,
+        ..., i +- k // 2, a dla nieparzystego k także z przeciwległym
+        i + size / 2; taki graf jest spójny. Następnie wykonuje
+        swaps_per_edge * m zamian krawędzi zachowujących stopnie i spójność
+        (randomize(connected=True)), więc czas jest bliski liniowemu
+        i nie ma losowania aż do skutku
+        """
+        if k < 2 and size != 2:
+            raise ValueError("Nie da się stworzyć zadanego grafu.")
+        if not is_valid_graph_sequence([k] * size):
+            raise ValueError("Niepoprawny ciąg graficzny")
+
+        nodes = np.arange(size)
+        begins = [nodes] * (k // 2)
+        ends = [(nodes + step) % size for step in range(1, k // 2 + 1)]
+        if k % 2 == 1:
+            half = nodes[: size // 2]
+            begins.append(half)
+            ends.append(half + size // 2)
+        g = SimpleGraph().from_edge_arrays(
+            np.concatenate(begins) + 1, np.concatenate(ends) + 1, size=size
+        )
+        # graf pełny (k = size - 1) jest tylko jeden
+        if len(g.edges) >= 2 and k < size - 1:
+            g.randomize(swaps_per_edge * len(g.edges), seed=seed, connected=True)
         return g
 
     @staticmethod
-    def get_random_graph(max_size=20) -> SimpleGraph:
-        size = random.randint(2, max_size)
+    def get_random_graph(max_size=20, seed: int = None) -> SimpleGraph:
+        rng = random if seed is None else random.Random(seed)
+        size = rng.randint(2, max_size)
         g = SimpleGraph(size)
-        g.connect_random(random.random())
+        g.connect_random(rng.random(), seed=rng.getrandbits(32))
         return g
 
     @staticmethod
-    def get_random_connected_graph(max_size=20) -> SimpleGraph:
-        g = GraphBuilder.get_random_graph(max_size)
+    def get_random_connected_graph(max_size=20, seed: int = None) -> SimpleGraph:
+        rng = random if seed is None else random.Random(seed)
+        g = GraphBuilder.get_random_graph(max_size, seed=rng.getrandbits(32))
         while not g.is_connected_graph():
-            g = GraphBuilder.get_random_graph(max_size)
+            g = GraphBuilder.get_random_graph(max_size, seed=rng.getrandbits(32))
         return g
 
     @staticmethod
-    def get_random_weighted_graph(max_size=20) -> SimpleGraph:
-        g = GraphBuilder.get_random_graph(max_size)
-        g.assign_random_weights()
+    def get_random_weighted_graph(max_size=20, seed: int = None) -> SimpleGraph:
+        rng = random if seed is None else random.Random(seed)
+        g = GraphBuilder.get_random_graph(max_size, seed=rng.getrandbits(32))
+        g.assign_random_weights(seed=rng.getrandbits(32))
         return g
 
     @staticmethod
-    def get_random_weighted_connected_graph(max_size=20) -> SimpleGraph:
-        g = GraphBuilder.get_random_connected_graph(max_size)
-        g.assign_random_weights()
+    def get_random_weighted_connected_graph(
+        max_size=20, seed: int = None
+    ) -> SimpleGraph:
+        rng = random if seed is None else random.Random(seed)
+        g = GraphBuilder.get_random_connected_graph(max_size, seed=rng.getrandbits(32))
+        g.assign_random_weights(seed=rng.getrandbits(32))
         return g
 
     @staticmethod
-    def get_random_digraph(max_size=20) -> DirectedGraph:
-        size = random.randint(2, max_size)
+    def get_random_digraph(max_size=20, seed: int = None) -> DirectedGraph:
+        rng = random if seed is None else random.Random(seed)
+        size = rng.randint(2, max_size)
         g = DirectedGraph(size)
-        g.connect_random(random.random())
+        g.connect_random(rng.random(), seed=rng.getrandbits(32))
         return g
 
     @staticmethod
-    def get_random_flow_network(N: int) -> DirectedGraph:
+    def ensemble(
+        generator: Callable[..., Graph],
+        count: int,
+        *args: Any,
+        seed: int = None,
+        processes: int = None,
+        edge_tables: bool = False,
+        **kwargs: Any,
+    ) -> Iterator[Union[Graph, Tuple[int, EdgeTable]]]:
+        """
+        Leniwie tworzy count grafów generator(*args, seed=..., **kwargs),
+        np. GraphBuilder.ensemble(GraphBuilder.get_random_graph, 1000, 50)
+            seed:
+                z niego losowane są ziarna kolejnych grafów, więc wynik
+                nie zależy od liczby procesów
+            processes:
+                liczba procesów roboczych (domyślnie liczba procesorów);
+                dla 1 grafy są tworzone w bieżącym procesie
+            edge_tables:
+                zamiast grafów zwraca pary (liczba wierzchołków, EdgeTable)
+        Procesy robocze przesyłają grafy jako tablice krawędzi, a grafy są
+        zwracane w kolejności ziaren, gdy tylko będą gotowe
+        """
+        rng = random if seed is None else random.Random(seed)
+        tasks = (
+            (generator, args, kwargs, rng.getrandbits(ENSEMBLE_SEED_BITS))
+            for _ in range(count)
+        )
+        if processes == 1:
+            results = map(_generate, tasks)
+            yield from GraphBuilder._ensemble_results(results, edge_tables)
+            return
+        with multiprocessing.Pool(processes) as pool:
+            chunksize = max(1, min(64, count // (4 * (processes or os.cpu_count()))))
+            results = pool.imap(_generate, tasks, chunksize)
+            yield from GraphBuilder._ensemble_results(results, edge_tables)
+
+    @staticmethod
+    def _ensemble_results(
+        results: Iterator[Tuple[Type[Graph], int, Any, Any]], edge_tables: bool
+    ) -> Iterator[Union[Graph, Tuple[int, EdgeTable]]]:
+        for graph_type, size, table, coordinates in results:
+            if isinstance(table, CompleteGraph):
+                yield (size, table.to_edge_table()) if edge_tables else table
+            elif edge_tables:
+                yield size, table
+            else:
+                g = graph_type().from_edge_arrays(
+                    table.begin, table.end, table.weight, size=size
+                )
+                if coordinates is not None:
+                    g.x, g.y = coordinates
+                yield g
+
+    @staticmethod
+    def get_random_flow_network(
+        N: int, seed: int = None, verbose: bool = False
+    ) -> DirectedGraph:
         """
         Losowa sieć przepływu
         N - liczba warstw sieci
         źródło - Node #1
         ujście - Node #len(graph)
+        Wierzchołki, krawędzie i przepustowości są losowane na tablicach numpy
         """
         assert N >= 2
+        rng = random_state(seed)
 
-        print(f"liczba warstw: {N}")
-
-        # krok 1: tworzenie warstw
-        node_count_in_layer = [1] + [random.randint(2, N) for _ in range(N)] + [1]
+        if verbose:
+            print(f"liczba warstw: {N}")
 
-        node_layer = [None]
-        layer_nodes = []
+        # krok 1: tworzenie warstw - wierzchołki warstwy i to first[i] + 1, ...,
+        # first[i] + node_count_in_layer[i]
+        node_count_in_layer = np.concatenate(([1], rng.randint(2, N + 1, N), [1]))
+        first = np.concatenate(([0], np.cumsum(node_count_in_layer)[:-1]))
+        size = int(node_count_in_layer.sum())
 
-        total = 1
-        for i, count in enumerate(node_count_in_layer):
-            node_layer.extend([i] * count)
-            layer_nodes.append(list(range(total, total + count)))
-            total += count
+        if verbose:
+            print(f"liczba wierzchołków w warstwie: {node_count_in_layer.tolist()}")
+            layer_nodes = [
+                list(range(f + 1, f + c + 1))
+                for f, c in zip(first.tolist(), node_count_in_layer.tolist())
+            ]
+            print(f"wierzchołki w warstwie: {layer_nodes}")
 
-        print(f"liczba wierzchołków w warstwie: {node_count_in_layer}")
-        print(f"wierzchołki w warstwie: {layer_nodes}")
+        # krok 2: losowanie krawędzi między warstwami - dla każdego wierzchołka
+        # warstw 1..N losowa krawędź wchodząca i losowa krawędź wychodząca
+        layer = np.repeat(np.arange(N + 2), node_count_in_layer)
+        inner = np.arange(size)[(layer > 0) & (layer <= N)]
+        inner_layer = layer[inner]
 
-        # krok 2: losowanie krawędzi między warstwami
-        g = DirectedGraph(size=sum(node_count_in_layer))
+        def random_nodes(layers: np.ndarray) -> np.ndarray:
+            counts = node_count_in_layer[layers]
+            return first[layers] + (rng.random_sample(len(layers)) * counts).astype(
+                np.int64
+            )
 
-        for i in range(1, N + 1):
-            for node in layer_nodes[i]:
-                # losowa krawędź wchodząca
-                g.connect(random.choice(layer_nodes[i - 1]), node)
-                # losowa krawędź wychodząca
-                g.connect(node, random.choice(layer_nodes[i + 1]))
+        begin = np.concatenate((random_nodes(inner_layer - 1), inner))
+        end = np.concatenate((inner, random_nodes(inner_layer + 1)))
+        codes = unique(begin * size + end)
 
-        # krok 3: odajemy 2N losowych łuków
+        # krok 3: dodajemy 2N losowych łuków między niepołączonymi wierzchołkami
+        # (brak krawędzi wychodzącej z ujścia i wchodzącej do źródła)
+        added = np.zeros(0, dtype=np.int64)
+        while len(added) < 2 * N:
+            batch = 4 * N
+            n1 = rng.randint(0, size - 1, batch)
+            n2 = rng.randint(1, size, batch)
+            n1, n2 = n1[n1 != n2], n2[n1 != n2]
+            taken = np.sort(np.concatenate((codes, added)))
+            new = n1 * size + n2
+            reverse = n2 * size + n1
+            fresh = ~is_in_sorted(new, taken) & ~is_in_sorted(reverse, taken)
+            new, reverse = new[fresh], reverse[fresh]
+            # para nie może się powtórzyć w żadnym kierunku także w tej porcji
+            pair = np.minimum(new, reverse)
+            _, index = unique(pair, return_index=True)
+            new = new[np.sort(index)]
+            added = np.concatenate((added, new[: 2 * N - len(added)]))
+        codes = np.concatenate((codes, added))
 
-        edges_added = 0
-        while edges_added < 2 * N:
-            # brak krawędzi wychodzącej z ujścia
-            n1 = random.randint(1, len(g) - 1)
-            # brak krawędzi wchodzącej do źródła
-            n2 = random.randint(2, len(g))
-            if n1 == n2 or g.is_connected(n1, n2) or g.is_connected(n2, n1):
-                continue
-            g.connect(n1, n2)
-            edges_added += 1
         # krok 4: przypisanie każdej krawędzi losowej przepustowości
-        g.assign_random_weights()
-
-        return g
+        begin, end = np.divmod(codes, size)
+        weight = rng.randint(1, 11, len(codes))
+        return DirectedGraph().from_edge_arrays(begin + 1, end + 1, weight, size=size)
 
     @staticmethod
     def get_random_2D_graph(
-        size=20, x_min=-50, x_max=50, y_min=-50, y_max=50
-    ) -> SimpleGraph:
-        filename = f"{size}_coordinates.tmp"
-        with open(filename, "w") as f:
-            for _ in range(size):
-                x = random.randint(x_min, x_max)
-                y = random.randint(y_min, y_max)
-                f.write(f"{x} {y}\n")
-        g = SimpleGraph().from_coordinates(filename)
-        return g
+        size=20,
+        x_min=-50,
+        x_max=50,
+        y_min=-50,
+        y_max=50,
+        seed: int = None,
+        implicit: bool = False,
+    ) -> Union[SimpleGraph, CompleteGraph]:
+        """
+        Graf pełny na losowych punktach o współrzędnych całkowitych
+            implicit:
+                zwraca CompleteGraph, który nie przechowuje krawędzi
+        """
+        rng = random_state(seed)
+        x = rng.randint(x_min, x_max + 1, size)
+        y = rng.randint(y_min, y_max + 1, size)
+        if implicit:
+            return CompleteGraph(x, y)
+        return SimpleGraph().from_points(x, y)
@@ -1,5 +1,8 @@
-from dataclasses import dataclass
-from typing import Any, List, Dict, Set
+from __future__ import annotations
+
+from typing import Any, List, Dict, Set, Iterable, Iterator, Hashable
+
+import numpy as np
 
 
 Weight = int
@@ -10,19 +13,118 @@ AdjacencyMatrix = List[List[int]]
 IncidenceMatrix = List[List[int]]
 
 
-@dataclass
 class Edge:
-    begin: Node
-    end: Node
-    weight: Weight = 1
+    __slots__ = ("begin", "end", "weight")
+
+    def __init__(self, begin: Node, end: Node, weight: Weight = 1) -> None:
+        self.begin = begin
+        self.end = end
+        self.weight = weight
+
+    def __repr__(self) -> str:
+        return f"Edge(begin={self.begin!r}, end={self.end!r}, weight={self.weight!r})"
 
     def __str__(self) -> str:
         s = f"{self.begin} -> {self.end} w: {self.weight}"
         return s
 
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.begin, self.end, self.weight) == (
+            other.begin,
+            other.end,
+            other.weight,
+        )
+
     def __hash__(self) -> Any:
-        return hash(str(self))
+        # waga nie wchodzi do skrótu, bo bywa zmieniana dla krawędzi,
+        # które już są w zbiorze (np. assign_random_weights)
+        return hash((self.begin, self.end))
 
     def sort(self) -> None:  # tylko do grafów prostych!
         if self.begin > self.end:
             self.begin, self.end = self.end, self.begin
+
+
+class EdgeTable:
+    """
+    Krawędzie zapisane jako struktura tablic: begin[i] -> end[i] o wadze weight[i]
+    Do przechowywania dużej liczby krawędzi bez tworzenia obiektów Edge
+    """
+
+    __slots__ = ("begin", "end", "weight")
+
+    def __init__(
+        self, begin: Iterable[Node], end: Iterable[Node], weight: Iterable = None
+    ) -> None:
+        self.begin = np.asarray(begin, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        if weight is None:
+            weight = np.ones(len(self.begin), dtype=np.int64)
+        self.weight = np.asarray(weight)
+        if not len(self.begin) == len(self.end) == len(self.weight):
+            raise ValueError("Tablice krawędzi muszą mieć tę samą długość")
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Edge]) -> EdgeTable:
+        edges = list(edges)
+        begin = [edge.begin for edge in edges]
+        end = [edge.end for edge in edges]
+        weight = [edge.weight for edge in edges] if edges else None
+        return cls(begin, end, weight)
+
+    def __len__(self) -> int:
+        return len(self.begin)
+
+    def __getitem__(self, i: int) -> Edge:
+        return Edge(self.begin[i].item(), self.end[i].item(), self.weight[i].item())
+
+    def __iter__(self) -> Iterator[Edge]:
+        for begin, end, weight in zip(
+            self.begin.tolist(), self.end.tolist(), self.weight.tolist()
+        ):
+            yield Edge(begin, end, weight)
+
+    @property
+    def nbytes(self) -> int:
+        return self.begin.nbytes + self.end.nbytes + self.weight.nbytes
+
+
+class DisjointSet:
+    """Zbiory rozłączne (union-find) z kompresją ścieżek i łączeniem wg wielkości"""
+
+    def __init__(self, elements: Iterable[Hashable] = ()) -> None:
+        self.parent: Dict[Hashable, Hashable] = {}
+        self.size: Dict[Hashable, int] = {}
+        # liczba rozłącznych zbiorów
+        self.count = 0
+        for x in elements:
+            self.add(x)
+
+    def add(self, x: Hashable) -> None:
+        if x not in self.parent:
+            self.parent[x] = x
+            self.size[x] = 1
+            self.count += 1
+
+    def find(self, x: Hashable) -> Hashable:
+        """Zwraca reprezentanta zbioru zawierającego x"""
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x: Hashable, y: Hashable) -> bool:
+        """Łączy zbiory zawierające x i y; False jeśli to już ten sam zbiór"""
+        x = self.find(x)
+        y = self.find(y)
+        if x == y:
+            return False
+        if self.size[x] < self.size[y]:
+            x, y = y, x
+        self.parent[y] = x
+        self.size[x] += self.size[y]
+        self.count -= 1
+        return True
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 import os
-import random
-import itertools
-from typing import Set, Dict, List
+from typing import Any, Set, Dict, List, Optional, Iterable
 
+import numpy as np
+
+from spacja.functions import sparse_to_matrix, matrix_to_sparse
 from spacja.graph import Graph
 from spacja.helper_structures import (
     Node,
     Edge,
+    EdgeTable,
+    DisjointSet,
     Weight,
     AdjacencyList,
     AdjacencyMatrix,
@@ -18,6 +21,8 @@ from spacja.helper_structures import (
 
 class SimpleGraph(Graph):
     def __init__(self, *args, **kwargs) -> None:
+        # spójne składowe utrzymywane przy connect, odbudowywane po disconnect
+        self._components: Optional[DisjointSet] = None
         super().__init__(*args, **kwargs)
         self.separator = "--"
         self.name = "graph"
@@ -40,7 +45,53 @@ class SimpleGraph(Graph):
             node1, node2 = node2, node1
         new_edge = Edge(node1, node2, weight)
 
+        self._unshare(node1, node2)
+        old_edge = self._adj[node1].get(node2)
+        if old_edge is not None:
+            self.edges.discard(old_edge)
+            self._count_weight(old_edge, -1)
+        else:
+            self._count_degree(node1, 1)
+            if node2 != node1:
+                self._count_degree(node2, 1)
         self.edges.add(new_edge)
+        self._count_weight(new_edge, 1)
+        if self._components is not None:
+            self._components.union(node1, node2)
+        self._adj[node1][node2] = new_edge
+        self._adj[node2][node1] = new_edge
+
+    def _insert_edges(
+        self, begins: List[Node], ends: List[Node], weights: List[Weight]
+    ) -> None:
+        """Wstawia sprawdzone krawędzie (begin <= end) do zbioru krawędzi i indeksu"""
+        adj = self._adj
+        edges = self.edges
+        for node1, node2, weight in zip(begins, ends, weights):
+            new_edge = Edge(node1, node2, weight)
+            old_edge = adj[node1].get(node2)
+            if old_edge is not None:
+                edges.discard(old_edge)
+                self._count_weight(old_edge, -1)
+            edges.add(new_edge)
+            adj[node1][node2] = new_edge
+            adj[node2][node1] = new_edge
+        # dodawanie krawędzi tylko łączy składowe, więc zbiory można uzupełnić
+        if self._components is not None:
+            union = self._components.union
+            for node1, node2 in zip(begins, ends):
+                union(node1, node2)
+
+    def _delete_edges(self, begins: List[Node], ends: List[Node]) -> None:
+        """Usuwa istniejące krawędzie ze zbioru krawędzi i indeksu"""
+        adj = self._adj
+        edges = self.edges
+        self._components = None
+        for node1, node2 in zip(begins, ends):
+            edge = adj[node1].pop(node2)
+            del adj[node2][node1]
+            edges.remove(edge)
+            self._count_weight(edge, -1)
 
     def disconnect(self, node1: Node, node2: Node) -> None:
         """Usuwa krawędż między wierzchołkiem node1 a node2"""
@@ -48,25 +99,52 @@ class SimpleGraph(Graph):
         if node1 not in self.nodes or node2 not in self.nodes or node1 == node2:
             raise ValueError
 
-        edges_to_be_deleted = [
-            edge for edge in self.edges if node1 == edge.begin and node2 == edge.end
-        ] + [edge for edge in self.edges if node1 == edge.end and node2 == edge.begin]
-
-        edge_to_be_deleted = edges_to_be_deleted[0]
+        self._unshare(node1, node2)
+        if node2 in self._adj[node1]:
+            self._count_degree(node1, -1)
+            self._count_degree(node2, -1)
+        edge_to_be_deleted = self._adj[node1].pop(node2)
+        del self._adj[node2][node1]
         self.edges.remove(edge_to_be_deleted)
+        self._count_weight(edge_to_be_deleted, -1)
+        self._components = None
+
+    def add_nodes(self, count: int = 1) -> None:
+        """Tworzy nowe wierzchołki"""
+        first = len(self) + 1
+        super().add_nodes(count)
+        if self._components is not None:
+            for i in range(first, len(self) + 1):
+                self._components.add(i)
+
+    def clear(self) -> None:
+        super().clear()
+        self._components = None
+
+    def copy(self, share: bool = False) -> SimpleGraph:
+        g = super().copy(share)
+        g._components = None
+        return g
 
     def is_connected(self, node1: Node, node2: Node) -> bool:
         """Czy stnieje krawędź node1 -- node2"""
-        return node2 in [
-            edge.end for edge in self.get_all_possible_edges() if edge.begin == node1
-        ]
+        return node2 in self._adj.get(node1, ())
 
     def is_complete(self) -> bool:
         n = len(self.nodes)
         return len(self.edges) == (n * (n - 1) / 2)
 
-    def to_adjacency_matrix(self) -> AdjacencyMatrix:
-        """Zwraca graf w postaci macierzy sąsiedztwa"""
+    def to_adjacency_matrix(
+        self, matrix_format: str = "list", dtype: Any = None
+    ) -> AdjacencyMatrix:
+        """
+        Zwraca graf w postaci macierzy sąsiedztwa
+            matrix_format:
+                list, numpy, coo, csr (patrz functions.sparse_to_matrix)
+        """
+        if matrix_format != "list":
+            return self.freeze().to_adjacency_matrix(matrix_format, dtype)
+
         adj_m = [[0 for _ in range(len(self))] for _ in range(len(self))]
         for edge in self.edges:
             n1 = edge.begin
@@ -77,8 +155,25 @@ class SimpleGraph(Graph):
 
         return adj_m
 
-    def to_incidence_matrix(self) -> IncidenceMatrix:
-        """Zwraca graf w postaci macierzy incydencji"""
+    def to_incidence_matrix(
+        self, matrix_format: str = "list", dtype: Any = None
+    ) -> IncidenceMatrix:
+        """
+        Zwraca graf w postaci macierzy incydencji
+            matrix_format:
+                list, numpy, coo, csr (patrz functions.sparse_to_matrix)
+        """
+        if matrix_format != "list":
+            table = self.to_edge_table()
+            columns = np.arange(len(table))
+            # pętla ma w kolumnie tylko jeden niezerowy element
+            no_loop = table.begin != table.end
+            rows = np.concatenate((table.begin, table.end[no_loop])) - 1
+            cols = np.concatenate((columns, columns[no_loop]))
+            values = np.concatenate((table.weight, table.weight[no_loop]))
+            shape = (len(self), len(table))
+            return sparse_to_matrix(rows, cols, values, shape, matrix_format, dtype)
+
         inc_m = [[0 for _ in range(len(self.edges))] for _ in range(len(self))]
         for i, edge in enumerate(self.edges):
             n1 = edge.begin
@@ -89,90 +184,104 @@ class SimpleGraph(Graph):
 
         return inc_m
 
-    def from_adjacency_matrix(self, adj_m: AdjacencyMatrix) -> SimpleGraph:
-        """Wypełnianie grafu z macierzy sąsiedztwa"""
+    def from_adjacency_matrix(
+        self, adj_m: AdjacencyMatrix, matrix_format: str = "list", size: int = None
+    ) -> SimpleGraph:
+        """
+        Wypełnianie grafu z macierzy sąsiedztwa w formacie matrix_format
+            size:
+                liczba wierzchołków; dla formatu coo bez niej rozmiar jest
+                wyznaczany z największego indeksu, więc końcowe wierzchołki
+                izolowane zostałyby pominięte
+        """
+        shape = None if size is None else (size, size)
+        rows, cols, values, shape = matrix_to_sparse(adj_m, matrix_format, shape)
         self.clear()
+        # macierz jest kwadratowa, a rozmiar wyznaczony z trójki coo może nie być
+        self.add_nodes(max(shape))
 
-        size = len(adj_m)
-        self.add_nodes(size)
-
-        for n1 in range(len(self)):
-            for n2 in range(len(self)):
-                if n1 < n2 and adj_m[n1][n2]:
-                    # mapowanie numerów wierzchołków: n-1 -> n
-                    self.connect(n1 + 1, n2 + 1, weight=adj_m[n1][n2])
+        upper = rows < cols
+        # mapowanie numerów wierzchołków: n-1 -> n
+        self.connect_many(EdgeTable(rows[upper] + 1, cols[upper] + 1, values[upper]))
         return self
 
-    def from_incidence_matrix(self, inc_m: IncidenceMatrix) -> SimpleGraph:
-        """Wypełnianie grafu z macierzy incydencji"""
+    def from_incidence_matrix(
+        self, inc_m: IncidenceMatrix, matrix_format: str = "list", size: int = None
+    ) -> SimpleGraph:
+        """
+        Wypełnianie grafu z macierzy incydencji w formacie matrix_format
+            size:
+                liczba wierzchołków (patrz from_adjacency_matrix)
+        """
+        rows, cols, values, shape = matrix_to_sparse(inc_m, matrix_format)
+        if size is not None:
+            shape = (size, shape[1])
+        if np.any(np.bincount(cols, minlength=shape[1]) != 2):
+            raise ValueError("Każda kolumna macierzy incydencji musi mieć dwa wpisy")
         self.clear()
+        self.add_nodes(shape[0])
 
-        nodes_count = len(inc_m)
-        self.add_nodes(nodes_count)
-
-        edges_count = len(inc_m[0])
-        for i in range(edges_count):  # il. krawedzi
-            edge_nodes = []
-            weight = 0
-            for n in range(nodes_count):
-                # szukamy niezerowej wartosci w kolumnie
-                if inc_m[n][i]:
-                    edge_nodes.append(n)
-                    weight = inc_m[n][i]
-            # mapowanie numerów wierzchołków: n-1 -> n
-            self.connect(edge_nodes[0] + 1, edge_nodes[1] + 1, weight=weight)
+        # wpisy posortowane po kolumnach, w kolumnie po wierzchołkach
+        order = np.lexsort((rows, cols))
+        rows = rows[order] + 1
+        values = values[order]
+        self.connect_many(EdgeTable(rows[0::2], rows[1::2], values[1::2]))
         return self
 
-    def from_coordinates(self, filename):
-        self.clear()
-        with open(filename) as f:
-            content = f.readlines()
-
-        self.x = []
-        self.y = []
-        for line in content:
-            self.x.append(int(line.split()[0]))
-            self.y.append(int(line.split()[1]))
-
-        size = len(content)
-        self.add_nodes(size)
-        self.fill()
-
-        # weights
-        for edge in self.edges:
-            x1 = self.x[edge.begin - 1]
-            x2 = self.x[edge.end - 1]
-            y1 = self.y[edge.begin - 1]
-            y2 = self.y[edge.end - 1]
-            edge.weight = ((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
+    def from_coordinates(self, filename: str) -> SimpleGraph:
+        """Graf pełny z punktów zapisanych w pliku w wierszach "x y" (from_points)"""
+        points = np.loadtxt(filename, ndmin=2)
+        return self.from_points(points[:, 0], points[:, 1])
 
+    def from_points(self, x: Iterable[float], y: Iterable[float]) -> SimpleGraph:
+        """
+        Graf pełny o wierzchołkach w punktach (x[i], y[i]), wierzchołek i + 1,
+        z wagami krawędzi równymi odległościom euklidesowym
+        Odległości dla wszystkich par są liczone naraz na tablicach numpy
+        Współrzędne zostają w atrybutach x i y
+        """
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        if self.x.shape != self.y.shape or self.x.ndim != 1:
+            raise ValueError("Tablice x i y muszą być jednowymiarowe i równej długości")
+        self.clear()
+        self.add_nodes(len(self.x))
+        begin, end = np.triu_indices(len(self), 1)
+        dx = self.x[begin] - self.x[end]
+        dy = self.y[begin] - self.y[end]
+        weight = np.sqrt(dx * dx + dy * dy)
+        self.connect_many(EdgeTable(begin + 1, end + 1, weight))
         return self
 
     def fill(self):
-        nodes = list(self.nodes)
-        for n1 in nodes:
-            for n2 in nodes[n1:]:
-                self.connect(n1, n2)
+        begin, end = np.triu_indices(len(self), 1)
+        self.connect_many(EdgeTable(begin + 1, end + 1))
 
     def components(self) -> Dict[int, int]:
         """Zwraca słownik złożony z wierzchołków i spójnych składowych do których należą"""
-        g = self.to_adjacency_list()
-
-        nr = 0  # nr spójnej składowej
-        comp = {v: -1 for v in g}
-        for v in g:
-            if comp[v] == -1:
-                nr += 1
-                comp[v] = nr
-                self.components_r(nr, v, comp, g)
+        sets = self._component_sets()
+
+        numbers = {}  # reprezentant zbioru -> nr spójnej składowej
+        comp = {}
+        for v in self._adj:
+            root = sets.find(v)
+            if root not in numbers:
+                numbers[root] = len(numbers) + 1
+            comp[v] = numbers[root]
         return comp
 
-    def connect_random(self, p: float) -> None:
-        """
-        Łączy wierzchołki tak, aby prawdopodobieństwo istnienia krawędzi
-        między dowolnymi dwoma wierzchołkami wynosiło p
-        iteracja po każdej kombinacji bez powtórzeń 2 wierzchołków
-        """
-        for n1, n2 in itertools.combinations(self.nodes, 2):
-            if random.random() < p:
-                self.connect(n1, n2)
+    def _component_sets(self) -> DisjointSet:
+        """Zbiory rozłączne spójnych składowych, budowane ponownie po disconnect"""
+        if self._components is None:
+            sets = DisjointSet(self._adj)
+            for edge in self.edges:
+                sets.union(edge.begin, edge.end)
+            self._components = sets
+        return self._components
+
+    def is_connected_graph(self) -> bool:
+        """Czy jest to graf spójny"""
+        if len(self) == 0:
+            return False
+        # po zmianach zbiory są budowane raz, kolejne pytania kosztują O(1)
+        return self._component_sets().count == 1
@@ -2,6 +2,8 @@ import pytest
 
 import copy
 
+import numpy as np
+
 from spacja.algorithms import (
     find_eulerian_trail,
     find_hamiltonian_circuit,
@@ -11,9 +13,13 @@ from spacja.algorithms import (
     get_minimum_spanning_tree_kruskal,
     breadth_first_search,
     ford_fulkerson,
+    find_shortest_path_dijkstra,
+    find_shortest_path_dijkstra_multi_source,
+    find_shortest_path_bellman_ford,
+    find_shortest_paths_floyd_warshall,
 )
 from spacja.directed_graph import DirectedGraph
-from spacja.functions import get_trail_to_node
+from spacja.functions import get_trail_to_node, get_trail_from_successors
 from spacja.graph_builder import GraphBuilder as gb
 from spacja.helper_structures import Edge
 from spacja.simple_graph import SimpleGraph
@@ -87,6 +93,92 @@ class TestAlgorithms:
         g = SimpleGraph().from_adjacency_matrix(graph)
         assert get_minimax_graph_center(g) == minimax_center
 
+    def test_find_shortest_path_dijkstra(self):
+        g = SimpleGraph().from_adjacency_matrix(self.G4)
+        d, p = find_shortest_path_dijkstra(g, 1)
+        assert d == {1: 0, 2: 3, 3: 10, 4: 19, 5: 8, 6: 9, 7: 15}
+        assert get_trail_to_node(p, 4) == [1, 2, 6, 4]
+
+        dg = DirectedGraph().from_adjacency_matrix(self.G4)
+        d, _ = find_shortest_path_dijkstra(dg, 3)
+        assert d == find_shortest_path_bellman_ford(dg, 3)[0]
+
+    def test_find_shortest_path_dijkstra_target(self):
+        g = SimpleGraph().from_adjacency_matrix(self.G4)
+        d, p = find_shortest_path_dijkstra(g, 1, target=6)
+        assert d[6] == 9
+        assert get_trail_to_node(p, 6) == [1, 2, 6]
+        # wierzchołek 4 jest dalej niż 6, więc nie został osiągnięty
+        assert d[4] == float("inf")
+
+        g = SimpleGraph(3)
+        g.connect(1, 2, 10)
+        g.connect(1, 3, 1)
+        g.connect(2, 3, 1)
+        d, p = find_shortest_path_dijkstra(g, 1, target=3)
+        assert d == {1: 0, 2: float("inf"), 3: 1}
+        assert p == {1: None, 2: None, 3: 1}
+
+    def test_find_shortest_path_dijkstra_multi_source(self):
+        g = SimpleGraph().from_adjacency_matrix(self.G4)
+        d, p = find_shortest_path_dijkstra_multi_source(g, [1, 4])
+        assert d == {1: 0, 2: 3, 3: 10, 4: 0, 5: 8, 6: 9, 7: 15}
+        assert p[1] is None and p[4] is None
+        for node in g.nodes:
+            single = min(find_shortest_path_dijkstra(g, s)[0][node] for s in (1, 4))
+            assert d[node] == single
+
+    @pytest.mark.parametrize("graph_class", [SimpleGraph, DirectedGraph])
+    def test_get_distances_to_nodes_matrix(self, graph_class):
+        g = graph_class(30)
+        g.add_random_edges(60, seed=5)
+        g.assign_random_weights(seed=5)
+        m = get_distances_to_nodes_matrix(g, algorithm="dijkstra")
+        assert m.shape == (30, 30)
+        for node in g.nodes:
+            distances, _ = find_shortest_path_dijkstra(g, node)
+            assert m[node - 1].tolist() == [distances[v] for v in sorted(g.nodes)]
+        parallel = get_distances_to_nodes_matrix(g, processes=2, algorithm="dijkstra")
+        assert np.array_equal(parallel, m)
+
+    @pytest.mark.parametrize("graph_class", [SimpleGraph, DirectedGraph])
+    @pytest.mark.parametrize("block_size", [1, 4, 64])
+    def test_find_shortest_paths_floyd_warshall(self, graph_class, block_size):
+        g = graph_class(30)
+        g.add_random_edges(60, seed=7)
+        g.assign_random_weights(seed=7)
+        D, S = find_shortest_paths_floyd_warshall(g, block_size=block_size)
+        assert np.array_equal(D, get_distances_to_nodes_matrix(g, algorithm="dijkstra"))
+        for begin in g.nodes:
+            for end in g.nodes:
+                trail = get_trail_from_successors(S, begin, end)
+                if D[begin - 1, end - 1] == np.inf:
+                    assert trail == []
+                    continue
+                assert trail[0] == begin and trail[-1] == end
+                length = sum(
+                    g.edge_to_node(u, v).weight for u, v in zip(trail, trail[1:])
+                )
+                assert length == D[begin - 1, end - 1]
+
+    def test_floyd_warshall_negative_cycle(self):
+        g = DirectedGraph(3)
+        g.connect(1, 2, 1)
+        g.connect(2, 3, -2)
+        g.connect(3, 1, 0)
+        with pytest.raises(ValueError):
+            find_shortest_paths_floyd_warshall(g)
+
+    @pytest.mark.parametrize("graph, center", GRAPHS_WITH_CENTERS)
+    def test_get_graph_center_algorithms(self, graph, center):
+        g = SimpleGraph().from_adjacency_matrix(graph)
+        dijkstra = get_distances_to_nodes_matrix(g, algorithm="dijkstra")
+        floyd_warshall = get_distances_to_nodes_matrix(g, algorithm="floyd_warshall")
+        assert np.array_equal(dijkstra, floyd_warshall)
+        assert int(np.argmin(floyd_warshall.sum(axis=1))) + 1 == center
+        with pytest.raises(ValueError):
+            get_distances_to_nodes_matrix(g, algorithm="bfs")
+
     def test_get_minimum_spanning_tree_kruskal(self):
         g = gb.get_random_connected_graph()
         mst1 = get_minimum_spanning_tree_kruskal(g)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from spacja.algorithms import simulated_annealing, circuit_length
+from spacja.complete_graph import CompleteGraph
+from spacja.graph_builder import GraphBuilder
+from spacja.simple_graph import SimpleGraph
+
+
+class TestCompleteGraph:
+    X = [0, 3, 3, 0, 7]
+    Y = [0, 0, 4, 4, 1]
+
+    @pytest.mark.parametrize("cache", [False, True])
+    def test_matches_simple_graph(self, cache):
+        g = SimpleGraph().from_points(self.X, self.Y)
+        cg = CompleteGraph(self.X, self.Y, cache=cache)
+
+        assert len(cg) == len(g)
+        assert cg.nodes == g.nodes
+        assert cg.is_complete()
+        assert cg.graph_sequence() == g.graph_sequence()
+        assert np.allclose(cg.to_adjacency_matrix("list"), g.to_adjacency_matrix())
+        for edge in g.edges:
+            assert cg.is_connected(edge.begin, edge.end)
+            assert cg.edge_to_node(edge.begin, edge.end).weight == pytest.approx(
+                edge.weight
+            )
+        for node in g.nodes:
+            assert cg.node_neighbours(node) == g.node_neighbours(node)
+            assert cg.node_degree(node) == g.node_degree(node)
+            assert cg.node_weights(node) == pytest.approx(g.node_weights(node))
+        with pytest.raises(KeyError):
+            cg.edge_to_node(1, 1)
+
+    def test_lazy_matrix(self):
+        cg = CompleteGraph(self.X, self.Y)
+        m = cg.to_adjacency_matrix()
+        assert len(m) == len(m[0]) == 5
+        assert m[0][2] == m[0, 2] == 5.0
+        assert m[3][3] == 0.0
+        assert np.asarray(m) == pytest.approx(cg.to_adjacency_matrix("numpy"))
+        assert circuit_length(m, [1, 2, 3, 4]) == 14.0
+
+    def test_from_coordinates(self, tmp_path):
+        filename = str(tmp_path / "points.dat")
+        np.savetxt(filename, np.column_stack([self.X, self.Y]))
+        cg = CompleteGraph.from_coordinates(filename)
+        assert cg.x.tolist() == self.X
+        assert cg.y.tolist() == self.Y
+
+    def test_simulated_annealing(self):
+        g = GraphBuilder.get_random_2D_graph(size=12, seed=3, implicit=True)
+        assert isinstance(g, CompleteGraph)
+        P = simulated_annealing(g, MAX_IT=20)
+        assert sorted(P) == list(range(1, 13))
@@ -0,0 +1,187 @@
+import pytest
+
+from spacja.algorithms import (
+    find_eulerian_trail,
+    find_hamiltonian_circuit,
+    johnson_get_distances_to_nodes_matrix,
+    breadth_first_search,
+    find_shortest_path_dijkstra,
+    find_shortest_path_bellman_ford,
+    get_graph_center,
+    get_minimum_spanning_tree_kruskal,
+    ford_fulkerson,
+    page_rank,
+)
+from spacja.csr_graph import CSRGraph
+from spacja.directed_graph import DirectedGraph
+from spacja.functions import get_trail_to_node
+from spacja.graph_builder import GraphBuilder
+from spacja.simple_graph import SimpleGraph
+from test.test_algorithms import TestAlgorithms as Algorithms
+
+
+class TestCSRGraph:
+    def test_freeze_simple_graph(self):
+        g = SimpleGraph(8)
+        g.add_random_edges(15)
+        g.assign_random_weights()
+        csr = g.freeze()
+
+        assert len(csr) == len(g)
+        assert csr.nodes == g.nodes
+        assert len(csr.indptr) == len(g) + 1
+        assert len(csr.indices) == len(csr.weights) == 2 * len(g.edges)
+        assert csr.to_adjacency_list() == g.to_adjacency_list()
+        assert csr.to_adjacency_matrix() == g.to_adjacency_matrix()
+        assert csr.graph_sequence() == g.graph_sequence()
+        assert {(e.begin, e.end, e.weight) for e in csr.edges} == {
+            (e.begin, e.end, e.weight) for e in g.edges
+        }
+        for node in g.nodes:
+            assert csr.node_neighbours(node) == g.node_neighbours(node)
+            assert csr.node_degree(node) == g.node_degree(node)
+            assert {(e.end, e.weight) for e in csr.node_edges(node)} == {
+                (e.end, e.weight) for e in g.node_edges(node)
+            }
+
+    def test_freeze_directed_graph(self):
+        g = DirectedGraph(8)
+        g.add_random_edges(15)
+        csr = g.freeze()
+
+        assert len(csr.indices) == len(g.edges)
+        assert csr.to_adjacency_list() == g.to_adjacency_list()
+        assert csr.edges == g.edges
+        for edge in g.edges:
+            assert csr.is_connected(edge.begin, edge.end)
+            assert csr.edge_to_node(edge.begin, edge.end) == edge
+        with pytest.raises(KeyError):
+            csr.edge_to_node(1, 1)
+
+    @pytest.mark.parametrize("graph, center", Algorithms.GRAPHS_WITH_CENTERS)
+    def test_shortest_paths(self, graph, center):
+        g = SimpleGraph().from_adjacency_matrix(graph)
+        csr = g.freeze()
+        assert get_graph_center(csr) == center
+        assert find_shortest_path_dijkstra(csr, 1) == find_shortest_path_dijkstra(g, 1)
+
+        dg = DirectedGraph().from_adjacency_matrix(graph)
+        assert find_shortest_path_bellman_ford(
+            dg.freeze(), 1
+        ) == find_shortest_path_bellman_ford(dg, 1)
+
+    def test_breadth_first_search(self):
+        g = SimpleGraph().from_adjacency_list(Algorithms.BFS_G1)
+        tr = get_trail_to_node(breadth_first_search(g.freeze(), 1, 8), 8)
+        assert tr == [1, 3, 7, 8]
+
+    def test_kruskal(self):
+        g = SimpleGraph().from_adjacency_matrix(Algorithms.G2)
+        mst1 = get_minimum_spanning_tree_kruskal(g)
+        mst2 = get_minimum_spanning_tree_kruskal(g.freeze())
+        assert sum(e.weight for e in mst1.edges) == sum(e.weight for e in mst2.edges)
+
+    def test_ford_fulkerson(self):
+        g = DirectedGraph().from_adjacency_matrix(Algorithms.FF_G1)
+        f = ford_fulkerson(g.freeze())
+        assert sum(weight for ((begin, _), weight) in f.items() if begin == 1) == 19
+
+    def test_page_rank(self):
+        g = DirectedGraph(3)
+        g.connect(1, 2)
+        g.connect(2, 3)
+        g.connect(3, 1)
+        ranks = page_rank(g.freeze())
+        assert ranks == pytest.approx(page_rank(g))
+
+    @pytest.mark.parametrize("graph_class", [SimpleGraph, DirectedGraph])
+    def test_components(self, graph_class):
+        g = graph_class(12)
+        g.add_random_edges(14, seed=4)
+        csr = g.freeze()
+        # numery składowych zależą od kolejności sąsiadów, porównujemy podział
+        assert set(csr.components()) == g.nodes
+        assert sorted(csr.component_list().values()) == sorted(
+            g.component_list().values()
+        )
+        assert len(csr.largest_component()[1]) == len(g.largest_component()[1])
+        assert csr.is_connected_graph() == g.is_connected_graph()
+        assert csr.is_eulerian() == g.is_eulerian()
+
+    @pytest.mark.parametrize("graph_class", [SimpleGraph, DirectedGraph])
+    def test_thaw(self, graph_class):
+        g = graph_class(9)
+        g.add_random_edges(12)
+        g.assign_random_weights()
+        g2 = g.freeze().thaw()
+        assert type(g2) is graph_class
+        assert g2.to_adjacency_matrix() == g.to_adjacency_matrix()
+        edge = next(iter(g2.edges))
+        g2.disconnect(edge.begin, edge.end)
+        assert len(g2.edges) == len(g.edges) - 1
+
+    def test_find_eulerian_trail(self):
+        g = GraphBuilder.get_eulerian_graph(size=7, seed=2)
+        csr = g.freeze()
+        trail = find_eulerian_trail(csr)
+        assert trail[0] == trail[-1]
+        assert len(trail) == len(g.edges) + 1
+        for u, v in zip(trail, trail[1:]):
+            assert csr.is_connected(u, v)
+
+    def test_find_hamiltonian_circuit(self):
+        g = GraphBuilder.get_k_regular_graph(size=8, k=7)
+        circuit = find_hamiltonian_circuit(g.freeze())
+        assert sorted(circuit) == sorted(g.nodes)
+
+    def test_johnson(self):
+        g = DirectedGraph().from_adjacency_matrix(Algorithms.G4)
+        assert johnson_get_distances_to_nodes_matrix(
+            g.freeze()
+        ) == johnson_get_distances_to_nodes_matrix(g)
+
+    @pytest.mark.parametrize("graph_class", [SimpleGraph, DirectedGraph])
+    @pytest.mark.parametrize("mmap", [True, False])
+    def test_save_and_load(self, tmp_path, graph_class, mmap):
+        g = graph_class(9)
+        g.add_random_edges(15)
+        g.assign_random_weights()
+        filename = str(tmp_path / "graph.npg")
+        g.freeze().save(filename)
+
+        csr = CSRGraph.load(filename, mmap=mmap)
+        assert csr.directed == g.directed
+        assert csr.to_adjacency_matrix() == g.to_adjacency_matrix()
+        for node in g.nodes:
+            assert csr.node_neighbours(node) == g.node_neighbours(node)
+
+    def test_save_and_load_graph(self, tmp_path):
+        g = SimpleGraph(8)
+        g.add_random_edges(10)
+        g.connect(1, 2, weight=2.5)
+        filename = str(tmp_path / "graph")
+        g.save(filename, "npg")
+
+        g2 = SimpleGraph()
+        g2.load(filename + ".npg")
+        assert g2.to_adjacency_matrix() == g.to_adjacency_matrix()
+
+        with pytest.raises(ValueError):
+            CSRGraph.load(__file__)
+
+    def test_load_graph_wrong_direction(self, tmp_path):
+        filename = str(tmp_path / "graph")
+        SimpleGraph(3).save(filename, "npg")
+        with pytest.raises(ValueError):
+            DirectedGraph().load(filename + ".npg")
+
+        DirectedGraph(3).save(filename, "npg")
+        with pytest.raises(ValueError):
+            SimpleGraph().load(filename + ".npg")
+
+    def test_save_and_load_empty(self, tmp_path):
+        filename = str(tmp_path / "empty.npg")
+        DirectedGraph(3).freeze().save(filename)
+        csr = CSRGraph.load(filename)
+        assert len(csr) == 3
+        assert csr.to_adjacency_list() == {1: set(), 2: set(), 3: set()}
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 import copy
 
@@ -23,6 +24,38 @@ class TestDirectedGraph:
         assert g.is_connected(n1, n2)
         assert g.is_connected(n2, n1)
 
+    def test_node_predecessors(self):
+        g = DirectedGraph(4)
+        g.connect(1, 2)
+        g.connect(3, 2)
+        g.connect(2, 4)
+
+        assert g.node_neighbours(2) == {4}
+        assert g.node_predecessors(2) == {1, 3}
+        assert g.node_degree(2) == 1
+
+        g.disconnect(3, 2)
+        assert g.node_predecessors(2) == {1}
+        assert g.transposed().node_neighbours(2) == {1}
+
+    @pytest.mark.parametrize("share", [False, True])
+    def test_copy(self, share):
+        g = DirectedGraph(4)
+        g.connect(1, 2)
+        g.connect(2, 3)
+        before = g.to_adjacency_matrix()
+
+        g_copy = g.copy(share=share)
+        g_copy.connect(3, 2)
+        g_copy.disconnect(1, 2)
+        assert g.to_adjacency_matrix() == before
+        assert g.node_predecessors(2) == {1}
+        assert g_copy.node_predecessors(2) == {3}
+
+        if not share:
+            next(iter(g_copy.edges)).weight = 5
+            assert not g.is_weighted_graph()
+
     def test_adjacency_list(self):
         g = DirectedGraph(8)
         g.add_random_edges(15)
@@ -52,6 +85,41 @@ class TestDirectedGraph:
 
         assert before == after
 
+    @pytest.mark.parametrize("matrix_format", ["numpy", "coo", "csr"])
+    def test_matrix_formats(self, matrix_format):
+        g = DirectedGraph(8)
+        g.add_random_edges(15)
+        g.assign_random_weights()
+        adj_m = g.to_adjacency_matrix()
+        inc_m = g.to_incidence_matrix()
+
+        m = g.to_adjacency_matrix(matrix_format, dtype=np.int32)
+        if matrix_format == "numpy":
+            assert m.dtype == np.int32
+            assert m.tolist() == adj_m
+        g2 = DirectedGraph().from_adjacency_matrix(m, matrix_format, size=len(g))
+        assert g2.to_adjacency_matrix() == adj_m
+
+        m = g.to_incidence_matrix(matrix_format)
+        if matrix_format == "numpy":
+            assert m.tolist() == inc_m
+        g2 = DirectedGraph().from_incidence_matrix(m, matrix_format, size=len(g))
+        assert g2.to_adjacency_matrix() == adj_m
+
+    @pytest.mark.parametrize("matrix_format", ["list", "numpy", "coo", "csr"])
+    def test_matrix_formats_isolated_last_node(self, matrix_format):
+        g = DirectedGraph(5)
+        g.connect(1, 2)
+        m = g.to_adjacency_matrix(matrix_format)
+        g2 = DirectedGraph().from_adjacency_matrix(m, matrix_format, size=5)
+        assert len(g2) == 5
+        assert g2.to_adjacency_list() == g.to_adjacency_list()
+
+        m = g.to_incidence_matrix(matrix_format)
+        g2 = DirectedGraph().from_incidence_matrix(m, matrix_format, size=5)
+        assert len(g2) == 5
+        assert g2.to_adjacency_list() == g.to_adjacency_list()
+
     def test_adjacency_list_file(self):
         g = DirectedGraph(8)
         g.add_random_edges(15)
@@ -85,6 +153,67 @@ class TestDirectedGraph:
 
         assert before == after
 
+    def test_edge_list_file(self, tmp_path):
+        g = DirectedGraph(10)
+        g.add_random_edges(15)
+        filename = str(tmp_path / "graph")
+
+        before = g.to_adjacency_matrix()
+        g.save(filename, "el")
+        g.load(filename + ".el")
+        after = g.to_adjacency_matrix()
+
+        assert before == after
+
+    def test_add_random_edges_with_loop(self):
+        g = DirectedGraph(3)
+        g.connect(2, 2)
+        g.add_random_edges(6, seed=1)
+        assert len(g.edges) == 7
+        with pytest.raises(ValueError):
+            g.add_random_edges(1)
+
+    def test_add_random_edges(self):
+        g = DirectedGraph(6)  # 6 wierzchołków => max 30 krawędzi
+        g.add_random_edges(16, seed=1)
+        assert len(g.edges) == 16
+        g.add_random_edges(14)
+        assert len(g.edges) == 30
+        assert all(edge.begin != edge.end for edge in g.edges)
+        with pytest.raises(ValueError):
+            g.add_random_edges(1)
+
+    def test_randomize(self):
+        g = DirectedGraph(10)
+        g.connect_random(0.3, seed=2)
+        out_degrees = [len(g.node_neighbours(v)) for v in sorted(g.nodes)]
+        in_degrees = [len(g.node_predecessors(v)) for v in sorted(g.nodes)]
+        g.randomize(50, seed=1)
+        assert [len(g.node_neighbours(v)) for v in sorted(g.nodes)] == out_degrees
+        assert [len(g.node_predecessors(v)) for v in sorted(g.nodes)] == in_degrees
+
+    def test_connect_random(self):
+        n = 40
+        g1 = DirectedGraph(n)
+        g1.connect_random(0.25, seed=3)
+        g2 = DirectedGraph(n)
+        g2.connect_random(0.25, seed=3)
+        assert g1.edges == g2.edges
+        assert all(edge.begin != edge.end for edge in g1.edges)
+        # liczba krawędzi ma rozkład dwumianowy, tu z odchyleniem ok. 7-10
+        assert abs(len(g1.edges) - 0.25 * n * (n - 1)) < 60
+
+        g1.connect_random(1)
+        assert len(g1.edges) == n * (n - 1)
+
+    def test_connect_many(self):
+        g = DirectedGraph(3)
+        g.connect_many([(1, 2), (2, 1, 3), (1, 2, 2)])
+
+        assert g.to_adjacency_matrix() == [[0, 2, 0], [3, 0, 0], [0, 0, 0]]
+        assert g.node_predecessors(1) == {2}
+        assert g.graph_sequence() == [1, 1, 0]
+
     def test_is_connected_graph(self):
         g = DirectedGraph(3)
         g.connect(1, 2)
@@ -107,6 +236,47 @@ class TestDirectedGraph:
         assert comps[2] != comps[1]
         assert comps[2] != comps[3]
 
+    def test_components_long_path(self):
+        # głębokość przeszukiwania większa niż limit rekurencji
+        n = 5000
+        g = DirectedGraph(n)
+        g.connect_many((i, i + 1) for i in range(1, n))
+        assert len(set(g.components().values())) == n
+
+        g.connect(n, 1)
+        assert g.is_connected_graph()
+
+    def test_dfs_visit_shared_visited(self):
+        g = DirectedGraph(4)
+        g.connect(1, 2)
+        g.connect(2, 3)
+        adj = g.to_adjacency_list()
+        d = {v: -1 for v in g.nodes}
+        f = {v: -1 for v in g.nodes}
+        visited = set()
+        t = 0
+        for v in sorted(g.nodes):
+            if d[v] == -1:
+                t = g.dfs_visit(v, adj, d, f, t, visited)
+        assert d == {1: 1, 2: 2, 3: 3, 4: 7}
+        assert f == {1: 6, 2: 5, 3: 4, 4: 8}
+        assert visited == g.nodes
+
+    def test_reversed_view(self):
+        g = DirectedGraph(4)
+        g.connect(1, 2, weight=3)
+        g.connect(3, 2)
+        g.connect(2, 4)
+        r = g.reversed_view()
+
+        assert r.to_adjacency_list() == g.transposed().to_adjacency_list()
+        assert r.node_neighbours(2) == {1, 3}
+        assert r.edge_to_node(2, 1).weight == 3
+        assert r.is_connected(4, 2) and not r.is_connected(2, 4)
+
+        g.connect(4, 1)
+        assert r.node_neighbours(1) == {4}
+
     def test_component_list(self):
         g = DirectedGraph(3)
         g.connect(2, 1)
@@ -1,11 +1,28 @@
+import numpy as np
 import pytest
 
-from spacja.functions import is_valid_graph_sequence
+from spacja.functions import (
+    is_valid_graph_sequence,
+    dfs_events,
+    get_trail_to_node,
+    random_state,
+    sample_distinct,
+    unique,
+    strongly_connected_components,
+    dfs_components,
+    component_lists,
+)
 
 GRAPH_SEQUENCES = [
     ([4, 3, 3, 2, 2, 1, 1], True),
     ([4, 3, 3, 2, 2, 1], False),
     ([6, 6, 6, 4, 4, 2, 2], False),
+    ([], True),
+    ([0, 0, 0], True),
+    ([3, 3, 3, 3], True),
+    ([3, 3, 1, 1], False),
+    ([2, -1, 1], False),
+    ([1, 1, 1], False),
 ]
 
 
@@ -13,3 +30,65 @@ class TestFunctions:
     @pytest.mark.parametrize("sequence, result", GRAPH_SEQUENCES)
     def test_is_valid_graph_sequence(self, sequence, result):
         assert is_valid_graph_sequence(sequence) == result
+
+    def test_dfs_events(self):
+        g = {1: [2, 3], 2: [4], 3: [4], 4: []}
+        visited = set()
+        events = list(dfs_events(g, 1, visited))
+        assert events == [
+            (1, True),
+            (2, True),
+            (4, True),
+            (4, False),
+            (2, False),
+            (3, True),
+            (3, False),
+            (1, False),
+        ]
+        assert visited == {1, 2, 3, 4}
+        assert list(dfs_events(g, 3, visited)) == []
+
+    @pytest.mark.parametrize("count", [0, 3, 7, 10])
+    def test_sample_distinct(self, count):
+        rng = random_state(5)
+        hits = [0] * 10
+        for _ in range(2000):
+            sample = sample_distinct(10, count, rng).tolist()
+            assert sample == sorted(set(sample))
+            assert len(sample) == count
+            for i in sample:
+                hits[i] += 1
+        # każdy indeks powinien wypaść w około count / 10 losowań
+        assert all(abs(h / 2000 - count / 10) < 0.05 for h in hits)
+
+        with pytest.raises(ValueError):
+            sample_distinct(10, 11, rng)
+
+    @pytest.mark.parametrize("a", [[], [3, 1, 3, 2, 1], [5, 5, 5]])
+    def test_unique(self, a):
+        a = np.array(a, dtype=np.int64)
+        values, index = unique(a, return_index=True)
+        expected_values, expected_index = np.unique(a, return_index=True)
+        assert values.tolist() == expected_values.tolist()
+        assert index.tolist() == expected_index.tolist()
+        assert unique(a).tolist() == expected_values.tolist()
+
+    def test_random_state_wide_seed(self):
+        a = random_state(2 ** 40).randint(0, 10 ** 9, 5).tolist()
+        assert a == random_state(2 ** 40).randint(0, 10 ** 9, 5).tolist()
+        assert a != random_state(2 ** 40 + 1).randint(0, 10 ** 9, 5).tolist()
+
+    def test_components_helpers(self):
+        adj = {1: [2], 2: [3], 3: [1], 4: [3], 5: []}
+        adj_in = {1: [3], 2: [1], 3: [2, 4], 4: [], 5: []}
+        comp = strongly_connected_components(adj, adj_in)
+        assert sorted(component_lists(comp).values()) == [[1, 2, 3], [4], [5]]
+
+        undirected = {1: [2], 2: [1], 3: [], 4: [5], 5: [4]}
+        assert dfs_components(undirected, undirected) == {1: 1, 2: 1, 3: 2, 4: 3, 5: 3}
+
+    def test_get_trail_to_node(self):
+        n = 5000
+        predecessors = {1: None}
+        predecessors.update((i, i - 1) for i in range(2, n + 1))
+        assert get_trail_to_node(predecessors, n) == list(range(1, n + 1))
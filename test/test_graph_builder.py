@@ -0,0 +1,108 @@
+import pytest
+
+from spacja.algorithms import simulated_annealing
+
+from spacja.complete_graph import CompleteGraph
+from spacja.directed_graph import DirectedGraph
+from spacja.graph_builder import GraphBuilder as gb
+from spacja.simple_graph import SimpleGraph
+
+
+class TestGraphBuilder:
+    @pytest.mark.parametrize(
+        "generator, args",
+        [
+            (gb.get_random_graph, (30,)),
+            (gb.get_random_connected_graph, (12,)),
+            (gb.get_k_regular_graph, (10, 3, True)),
+            (gb.get_eulerian_graph, (8,)),
+            (gb.get_random_weighted_graph, (15,)),
+            (gb.get_random_digraph, (15,)),
+        ],
+    )
+    def test_seed(self, generator, args):
+        g1 = generator(*args, seed=11)
+        g2 = generator(*args, seed=11)
+        assert len(g1) == len(g2)
+        assert g1.edges == g2.edges
+
+    @pytest.mark.parametrize("size, k", [(2, 1), (3, 2), (10, 3), (30, 4), (9, 8)])
+    def test_connected_k_regular_graph(self, size, k):
+        g = gb.get_k_regular_graph(size, k, connected=True, seed=size)
+        assert g.graph_sequence() == [k] * size
+        assert g.is_connected_graph()
+
+    def test_connected_k_regular_graph_invalid(self):
+        with pytest.raises(ValueError):
+            gb.get_k_regular_graph(6, 1, connected=True)
+        with pytest.raises(ValueError):
+            gb.get_k_regular_graph(7, 3, connected=True)
+
+    @pytest.mark.parametrize("size, average_degree", [(3, 2), (10, 9), (50, 6)])
+    def test_eulerian_graph(self, size, average_degree):
+        g = gb.get_eulerian_graph(size, seed=size, average_degree=average_degree)
+        assert len(g) == size
+        assert g.is_eulerian()
+        assert 2 * len(g.edges) <= size * average_degree
+        with pytest.raises(ValueError):
+            gb.get_eulerian_graph(2)
+
+    def test_flow_network(self, capsys):
+        g = gb.get_random_flow_network(4, seed=7)
+        assert capsys.readouterr().out == ""
+        sink = len(g)
+        assert not g.node_predecessors(1)
+        assert not g.node_neighbours(sink)
+        assert all(not g.is_connected(e.end, e.begin) for e in g.edges)
+        assert all(1 <= e.weight <= 10 for e in g.edges)
+        assert g.edges == gb.get_random_flow_network(4, seed=7).edges
+
+        gb.get_random_flow_network(2, verbose=True)
+        assert "liczba warstw: 2" in capsys.readouterr().out
+
+    def test_ensemble(self):
+        serial = list(gb.ensemble(gb.get_random_graph, 6, 25, seed=3, processes=1))
+        parallel = list(gb.ensemble(gb.get_random_graph, 6, 25, seed=3, processes=2))
+        assert len(serial) == len(parallel) == 6
+        for g1, g2 in zip(serial, parallel):
+            assert isinstance(g2, SimpleGraph)
+            assert len(g1) == len(g2)
+            assert g1.edges == g2.edges
+            assert g1.graph_sequence() == g2.graph_sequence()
+        assert len({frozenset(g.edges) for g in serial}) > 1
+
+    def test_ensemble_2D_graph(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        for processes in (1, 2):
+            graphs = gb.ensemble(
+                gb.get_random_2D_graph, 2, 6, seed=2, processes=processes
+            )
+            for g in graphs:
+                assert len(g.x) == len(g.y) == 6
+                P = simulated_annealing(g, MAX_IT=5, save=True)
+                assert sorted(P) == list(range(1, 7))
+        assert (tmp_path / "SA.png").exists()
+
+    def test_ensemble_complete_graph(self):
+        graphs = list(gb.ensemble(gb.get_random_2D_graph, 2, 6, seed=1, implicit=True))
+        assert all(isinstance(g, CompleteGraph) and len(g) == 6 for g in graphs)
+        results = gb.ensemble(
+            gb.get_random_2D_graph, 2, 6, seed=1, implicit=True, edge_tables=True
+        )
+        for (size, table), g in zip(results, graphs):
+            assert size == 6
+            assert len(table) == 15
+            for edge in table:
+                assert edge.weight == pytest.approx(g.distance(edge.begin, edge.end))
+
+    def test_ensemble_edge_tables(self):
+        results = gb.ensemble(
+            gb.get_random_digraph, 3, max_size=10, seed=5, edge_tables=True
+        )
+        graphs = gb.ensemble(gb.get_random_digraph, 3, max_size=10, seed=5)
+        for (size, table), g in zip(results, graphs):
+            assert isinstance(g, DirectedGraph)
+            assert size == len(g)
+            assert set(zip(table.begin.tolist(), table.end.tolist())) == {
+                (edge.begin, edge.end) for edge in g.edges
+            }
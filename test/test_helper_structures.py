@@ -0,0 +1,75 @@
+import copy
+import pickle
+
+import pytest
+
+from spacja.helper_structures import Edge, EdgeTable, DisjointSet
+from spacja.simple_graph import SimpleGraph
+
+
+class TestEdge:
+    def test_equality(self):
+        assert Edge(1, 2) == Edge(1, 2, 1)
+        assert Edge(1, 2, 3) != Edge(1, 2, 4)
+        assert Edge(1, 2) != Edge(2, 1)
+        assert Edge(1, 2) != (1, 2, 1)
+        assert len({Edge(1, 2), Edge(1, 2, 1), Edge(1, 2, 5)}) == 2
+
+    def test_hash_survives_weight_change(self):
+        edge = Edge(1, 2)
+        edges = {edge}
+        edge.weight = 7
+        assert Edge(1, 2, 7) in edges
+        edges.remove(edge)
+        assert not edges
+
+    def test_slots(self):
+        edge = Edge(1, 2)
+        assert not hasattr(edge, "__dict__")
+        with pytest.raises(AttributeError):
+            edge.label = "a"
+
+    def test_copy(self):
+        edge = Edge(1, 2, 3)
+        assert copy.deepcopy(edge) == edge
+        assert pickle.loads(pickle.dumps(edge)) == edge
+
+
+class TestEdgeTable:
+    def test_from_edges(self):
+        g = SimpleGraph(8)
+        g.add_random_edges(15)
+        g.assign_random_weights()
+
+        table = g.to_edge_table()
+        assert len(table) == len(g.edges)
+        assert set(table) == g.edges
+        assert table[0] in g.edges
+
+    def test_default_weights(self):
+        table = EdgeTable([1, 2], [2, 3])
+        assert list(table) == [Edge(1, 2), Edge(2, 3)]
+        with pytest.raises(ValueError):
+            EdgeTable([1, 2], [2])
+
+    def test_empty(self):
+        table = SimpleGraph(3).to_edge_table()
+        assert len(table) == 0
+        assert list(table) == []
+
+
+class TestDisjointSet:
+    def test_union_find(self):
+        sets = DisjointSet(range(1, 6))
+        assert sets.count == 5
+        assert sets.union(1, 2)
+        assert sets.union(3, 4)
+        assert not sets.union(2, 1)
+        assert sets.count == 3
+        assert sets.find(1) == sets.find(2)
+        assert sets.find(1) != sets.find(3)
+
+        sets.add(6)
+        assert sets.union(6, 4)
+        assert sets.find(6) == sets.find(3)
+        assert sets.count == 3
@@ -1,6 +1,10 @@
+import numpy as np
+import random
+
 import pytest
 
 from spacja.graph import Node
+from spacja.directed_graph import DirectedGraph
 from spacja.simple_graph import SimpleGraph
 
 
@@ -22,6 +26,19 @@ class TestSimpleGraph:
         with pytest.raises(ValueError):
             g.from_graph_sequence([4, 3, 3, 2, 2, 1])
 
+        # remisy rozstrzygane jak przy stabilnym sortowaniu ciągu
+        g.from_graph_sequence([1, 2, 2, 1, 2])
+        assert g.to_adjacency_list() == {
+            1: {4},
+            2: {3, 5},
+            3: {2, 5},
+            4: {1},
+            5: {2, 3},
+        }
+
+        seq = [3] * 1000 + [1] * 1000
+        assert g.from_graph_sequence(seq).graph_sequence() == seq
+
     def test_connect(self):
         g = SimpleGraph(8)
         n1 = 1
@@ -35,6 +52,162 @@ class TestSimpleGraph:
         assert not g.is_connected(n1, n2)
         assert not g.is_connected(n2, n1)
 
+    def test_node_edges(self):
+        g = SimpleGraph(4)
+        g.connect(1, 2, weight=3)
+        g.connect(3, 2, weight=5)
+
+        assert g.node_neighbours(2) == {1, 3}
+        assert g.node_degree(2) == 2
+        assert {(e.begin, e.end, e.weight) for e in g.node_edges(2)} == {
+            (2, 1, 3),
+            (2, 3, 5),
+        }
+        assert g.edge_to_node(2, 3).weight == 5
+
+        g.connect(2, 3, weight=7)
+        assert len(g.edges) == 2
+        assert g.edge_to_node(3, 2).weight == 7
+
+        g.disconnect(2, 1)
+        assert g.node_neighbours(1) == set()
+        assert g.node_neighbours(2) == {3}
+
+    @pytest.mark.parametrize("share", [False, True])
+    def test_copy(self, share):
+        g = SimpleGraph(5)
+        g.connect(1, 2, weight=3)
+        g.connect(2, 3)
+        g.connect(4, 5)
+        before = g.to_adjacency_matrix()
+
+        g_copy = g.copy(share=share)
+        assert isinstance(g_copy, SimpleGraph)
+        assert g_copy.to_adjacency_matrix() == before
+
+        g_copy.disconnect(1, 2)
+        g_copy.connect(3, 4)
+        g_copy.add_nodes(1)
+        assert g.to_adjacency_matrix() == before
+        assert g_copy.node_neighbours(3) == {2, 4}
+
+        g.connect(1, 5)
+        assert not g_copy.is_connected(1, 5)
+        assert g_copy.node_neighbours(1) == set()
+
+    @pytest.mark.parametrize("graph_class", [SimpleGraph, DirectedGraph])
+    def test_counters_under_random_mutation(self, graph_class):
+        g = graph_class(12)
+        for _ in range(2000):
+            n1 = random.randint(1, len(g))
+            n2 = random.randint(1, len(g))
+            action = random.random()
+            if n1 == n2:
+                continue
+            if action < 0.5:
+                g.connect(n1, n2, weight=random.choice([1, 1, 2]))
+            elif action < 0.9:
+                if g.is_connected(n1, n2):
+                    g.disconnect(n1, n2)
+            elif action < 0.95:
+                g.add_nodes(1)
+            else:
+                g = g.copy(share=random.random() < 0.5)
+
+            degrees = sorted((len(g.node_neighbours(n)) for n in g.nodes), reverse=True)
+            assert g.graph_sequence() == degrees
+            assert g.is_weighted_graph() == any(e.weight != 1 for e in g.edges)
+
+        g.assign_random_weights(1, 1)
+        assert not g.is_weighted_graph()
+
+    def test_randomize(self):
+        g = SimpleGraph().from_graph_sequence([4, 3, 3, 2, 2, 2, 1, 1])
+        g.connect(1, 2, weight=5)
+        before = g.to_adjacency_list()
+        assert g.randomize(20, seed=4) == 20
+        assert g.graph_sequence() == [4, 3, 3, 2, 2, 2, 1, 1]
+        assert sorted(edge.weight for edge in g.edges) == [1] * 8 + [5]
+        assert g.to_adjacency_list() != before
+
+        g2 = SimpleGraph().from_graph_sequence([4, 3, 3, 2, 2, 2, 1, 1])
+        g2.connect(1, 2, weight=5)
+        g2.randomize(20, seed=4)
+        assert g2.edges == g.edges
+
+        g = SimpleGraph(20)
+        g.connect_many((i, i % 20 + 1) for i in range(1, 21))
+        g.randomize(200, connected=True)
+        assert g.is_connected_graph()
+
+        with pytest.raises(ValueError):
+            SimpleGraph(4).randomize(1, connected=True)
+
+    def test_from_points(self, tmp_path):
+        g = SimpleGraph().from_points([0, 3, 3], [0, 0, 4])
+        assert g.is_complete()
+        assert g.edge_to_node(1, 2).weight == 3
+        assert g.edge_to_node(2, 3).weight == 4
+        assert g.edge_to_node(1, 3).weight == 5
+        assert g.x.tolist() == [0, 3, 3]
+
+        filename = tmp_path / "coordinates.dat"
+        filename.write_text("0 0\n3 0\n3 4\n")
+        g2 = SimpleGraph().from_coordinates(str(filename))
+        assert g2.to_adjacency_matrix() == g.to_adjacency_matrix()
+
+        with pytest.raises(ValueError):
+            SimpleGraph().from_points([0, 1], [0])
+
+    def test_connect_random(self):
+        n = 40
+        g1 = SimpleGraph(n)
+        g1.connect_random(0.25, seed=3)
+        g2 = SimpleGraph(n)
+        g2.connect_random(0.25, seed=3)
+        assert g1.edges == g2.edges
+        assert all(edge.begin != edge.end for edge in g1.edges)
+        # liczba krawędzi ma rozkład dwumianowy, tu z odchyleniem ok. 7-10
+        assert abs(len(g1.edges) - 0.25 * n * (n - 1) // 2) < 60
+
+        g1.connect_random(1)
+        assert g1.is_complete()
+
+    def test_connect_many(self):
+        g = SimpleGraph(5)
+        g.connect(1, 2, weight=4)
+        g.connect_many([(2, 1), (3, 2, 5), (4, 5), (5, 4, 2)])
+
+        assert len(g.edges) == 3
+        assert g.edge_to_node(1, 2).weight == 1
+        assert g.edge_to_node(2, 3).weight == 5
+        assert g.edge_to_node(4, 5).weight == 2
+        assert g.graph_sequence() == [2, 1, 1, 1, 1]
+        assert g.is_weighted_graph()
+        assert g.component_list() == {1: [1, 2, 3], 2: [4, 5]}
+
+        with pytest.raises(ValueError):
+            g.connect_many([(1, 6)])
+        with pytest.raises(ValueError):
+            g.connect_many([(0, 1)])
+
+        g.disconnect_many([(2, 1), (5, 4)])
+        assert len(g.edges) == 1
+        assert g.graph_sequence() == [1, 1, 0, 0, 0]
+        assert g.is_weighted_graph()
+        with pytest.raises(KeyError):
+            g.disconnect_many([(1, 2)])
+
+    def test_from_edge_arrays(self):
+        g = SimpleGraph().from_edge_arrays([1, 2, 3], [2, 3, 1], [1.5, 2, 3])
+        assert len(g) == 3
+        assert g.is_complete()
+        assert g.edge_to_node(2, 1).weight == 1.5
+
+        g.from_edge_arrays([], [], size=4)
+        assert len(g) == 4
+        assert not g.edges
+
     def test_is_connected_graph(self):
         g = SimpleGraph(4)
         g.connect(1, 2)
@@ -44,6 +217,22 @@ class TestSimpleGraph:
         g.connect(2, 3)
         assert g.is_connected_graph()
 
+    def test_add_random_edges_with_loop(self):
+        produced = set()
+        for seed in range(50):
+            g = SimpleGraph(3)
+            g.connect(2, 2)
+            g.add_random_edges(1, seed=seed)
+            produced |= {(e.begin, e.end) for e in g.edges if e.begin != e.end}
+        assert produced == {(1, 2), (1, 3), (2, 3)}
+
+        g = SimpleGraph(3)
+        g.connect(2, 2)
+        g.add_random_edges(3)
+        assert len(g.edges) == 4
+        with pytest.raises(ValueError):
+            g.add_random_edges(1)
+
     def test_add_random_edges(self):
         g = SimpleGraph(8)  # 8 vertices => max 28 edges
         g.add_random_edges(8)
@@ -93,6 +282,41 @@ class TestSimpleGraph:
 
         assert before == after
 
+    @pytest.mark.parametrize("matrix_format", ["numpy", "coo", "csr"])
+    def test_matrix_formats(self, matrix_format):
+        g = SimpleGraph(8)
+        g.add_random_edges(15)
+        g.assign_random_weights()
+        adj_m = g.to_adjacency_matrix()
+        inc_m = g.to_incidence_matrix()
+
+        m = g.to_adjacency_matrix(matrix_format, dtype=np.int32)
+        if matrix_format == "numpy":
+            assert m.dtype == np.int32
+            assert m.tolist() == adj_m
+        g2 = SimpleGraph().from_adjacency_matrix(m, matrix_format, size=len(g))
+        assert g2.to_adjacency_matrix() == adj_m
+
+        m = g.to_incidence_matrix(matrix_format)
+        if matrix_format == "numpy":
+            assert m.tolist() == inc_m
+        g2 = SimpleGraph().from_incidence_matrix(m, matrix_format, size=len(g))
+        assert g2.to_adjacency_matrix() == adj_m
+
+    @pytest.mark.parametrize("matrix_format", ["list", "numpy", "coo", "csr"])
+    def test_matrix_formats_isolated_last_node(self, matrix_format):
+        g = SimpleGraph(5)
+        g.connect(1, 2)
+        m = g.to_adjacency_matrix(matrix_format)
+        g2 = SimpleGraph().from_adjacency_matrix(m, matrix_format, size=5)
+        assert len(g2) == 5
+        assert g2.to_adjacency_list() == g.to_adjacency_list()
+
+        m = g.to_incidence_matrix(matrix_format)
+        g2 = SimpleGraph().from_incidence_matrix(m, matrix_format, size=5)
+        assert len(g2) == 5
+        assert g2.to_adjacency_list() == g.to_adjacency_list()
+
     def test_adjacency_list_file(self):
         g = SimpleGraph(8)
         g.add_random_edges(15)
@@ -126,6 +350,44 @@ class TestSimpleGraph:
 
         assert before == after
 
+    def test_edge_list_file(self, tmp_path):
+        g = SimpleGraph(10)
+        g.add_random_edges(15)
+        g.assign_random_weights()
+        filename = str(tmp_path / "graph")
+
+        before = g.to_adjacency_matrix()
+        g.save(filename, "el")
+        g.load(filename + ".el")
+        after = g.to_adjacency_matrix()
+
+        assert before == after
+
+    def test_load_edge_list(self):
+        lines = ["# dump bez nagłówka\n", "1 2\n", "\n", "2 5 0.5\n"]
+        g = SimpleGraph().load_edge_list(lines)
+        assert len(g) == 5
+        assert g.edge_to_node(5, 2).weight == 0.5
+        assert g.edge_to_node(1, 2).weight == 1
+
+        g.load_edge_list(["# 7 1\n", "1 2\n"])
+        assert len(g) == 7
+
+        with pytest.raises(ValueError):
+            g.load_edge_list(["1 2 3 4\n"])
+
+    def test_connect_many_mixed_weights(self):
+        g = SimpleGraph(3)
+        g.connect_many([(1, 2, 3), (2, 3, 2.5), (1, 3)])
+        assert type(g.edge_to_node(1, 2).weight) is int
+        assert type(g.edge_to_node(1, 3).weight) is int
+        assert type(g.edge_to_node(2, 3).weight) is float
+        assert g.to_adjacency_matrix() == [[0, 3, 1], [3, 0, 2.5], [1, 2.5, 0]]
+
+        g = SimpleGraph().load_edge_list(["1 2 3\n", "2 3 2.5\n"])
+        assert type(g.edge_to_node(1, 2).weight) is int
+        assert type(g.edge_to_node(2, 3).weight) is float
+
     def test_components(self):
         g = SimpleGraph()
         g.from_graph_sequence([4, 3, 3, 2, 2, 1, 1])
@@ -135,6 +397,62 @@ class TestSimpleGraph:
         assert comps[6] == comps[7]
         assert comps[1] != comps[6]
 
+    def test_components_after_mutation(self):
+        g = SimpleGraph(6)
+        g.connect(1, 2)
+        g.connect(3, 4)
+        assert g.components() == {1: 1, 2: 1, 3: 2, 4: 2, 5: 3, 6: 4}
+
+        g.connect(2, 3)
+        g.add_nodes(1)
+        g.connect(7, 6)
+        assert g.component_list() == {1: [1, 2, 3, 4], 2: [5], 3: [6, 7]}
+
+        g.disconnect(2, 3)
+        assert g.component_list() == {1: [1, 2], 2: [3, 4], 3: [5], 4: [6, 7]}
+        assert g.largest_component() == (1, [1, 2])
+
+        g.connect(5, 4)
+        g.connect(5, 6)
+        g.connect(5, 1)
+        assert g.is_connected_graph()
+        assert g.copy().is_connected_graph()
+
+    def test_components_after_connect_many(self):
+        g = SimpleGraph(6)
+        g.connect(1, 2)
+        assert g.components() == {1: 1, 2: 1, 3: 2, 4: 3, 5: 4, 6: 5}
+        sets = g._components
+
+        g.connect_many([(3, 4), (2, 3, 5)])
+        assert g._components is sets
+        assert g.component_list() == {1: [1, 2, 3, 4], 2: [5], 3: [6]}
+
+    def test_is_connected_graph_rebuilds_sets(self):
+        g = SimpleGraph(4)
+        g.connect_many([(1, 2), (2, 3), (3, 4), (4, 1)])
+        g.disconnect(1, 2)
+        assert g._components is None
+        assert g.is_connected_graph()
+        assert g._components is not None
+        g.disconnect(3, 4)
+        assert not g.is_connected_graph()
+        assert g._components.count == 2
+
+    def test_components_r_shared_visited(self):
+        g = SimpleGraph(3000)
+        g.connect_many([(1, 2), (2, 3), (2999, 3000)])
+        adj = g.to_adjacency_list()
+        comp = {v: -1 for v in g.nodes}
+        visited = set()
+        nr = 0
+        for v in sorted(g.nodes):
+            if comp[v] == -1:
+                nr += 1
+                g.components_r(nr, v, comp, adj, visited)
+        assert comp == g.components()
+        assert len(visited) == len(g)
+
     def test_component_list(self):
         g = SimpleGraph()
         g.from_graph_sequence([4, 3, 3, 2, 2, 1, 1])